@@ -0,0 +1,164 @@
+"""
+SHARED API HELPERS
+Streamed chat-completions calls and tool-call parsing, used by test_limits.py
+and test_chain_limits.py
+"""
+import json
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Dict, List, Optional, Tuple, Union
+
+try:
+    import orjson
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+    _dumps_bytes = orjson.dumps
+    _loads = orjson.loads
+except ImportError:  # orjson is optional - fall back to stdlib json
+    def _dumps(obj) -> str:
+        return json.dumps(obj)
+
+    def _dumps_bytes(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+    _loads = json.loads
+
+# Shared HTTP session - reuses keep-alive connections across requests
+_SESSION = requests.Session()
+_SESSION.headers["Content-Type"] = "application/json"
+# Local server - skip gzip negotiation so replies are read without a zlib pass
+_SESSION.headers["Accept-Encoding"] = "identity"
+_SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
+# Tool-call sentinels and patterns, compiled once for every extraction
+_TC_START = "<|tool_call_start|>"
+_TC_END = "<|tool_call_end|>"
+# Delimited payload with optional [ ] and padding, captured in one search
+_PAYLOAD_RE = re.compile(
+    re.escape(_TC_START) + r'\s*\[?(.*?)\]?\s*' + re.escape(_TC_END), re.DOTALL
+)
+_TOOL_CALL_RE = re.compile(r'\w+\([^)]*\)')
+
+
+class ChatAPI:
+    """Streamed chat-completions calls for one endpoint, model and sampling setup"""
+
+    def __init__(self, base_url: str, model: str, incremental: bool = False, cache_size: int = 0, **sampling):
+        """
+        incremental: encode each conversation only as it grows (tracked per thread)
+        cache_size: LRU of replies to byte-identical requests (0 disables) - only
+        meaningful when sampling is deterministic (temperature 0)
+        """
+        self.url = f"{base_url}/chat/completions"
+        # Request body up to the messages array - per-call messages and tools are spliced in
+        self.body_head = _dumps_bytes(
+            {"model": model, **sampling, "stream": True}
+        )[:-1] + b',"messages":'
+        self.incremental = incremental
+        # Per-thread conversation being encoded: ref, and b"[msg0,msg1,..." for its first len messages
+        self._msgs = threading.local()
+        self.cache_size = cache_size
+        self._resp_cache: "OrderedDict[Tuple[bytes, Optional[int]], str]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def __call__(self, messages: List[Dict], tools: Union[List[Dict], bytes, None] = None,
+                 max_deltas: Optional[int] = None) -> str:
+        """
+        Raw API call - streamed, stops reading once a tool call is complete
+        or after max_deltas content deltas (about one token each).
+        tools may come pre-encoded (encode_tools) when several calls share them.
+        """
+        body = self.body_head + self._messages_json(messages)
+        if tools:
+            body += b',"tools":' + (tools if isinstance(tools, bytes) else _dumps_bytes(tools))
+        body += b"}"
+        if not self.cache_size:
+            return self._post(body, max_deltas)
+
+        # A reply cut at a budget only stands in for calls with the same budget
+        key = (hashlib.blake2b(body, digest_size=16).digest(), max_deltas)
+        with self._cache_lock:
+            content = self._resp_cache.get(key)
+            if content is not None:
+                self._resp_cache.move_to_end(key)
+                return content
+
+        content = self._post(body, max_deltas)
+        with self._cache_lock:
+            self._resp_cache[key] = content
+            if len(self._resp_cache) > self.cache_size:
+                self._resp_cache.popitem(last=False)
+        return content
+
+    def _post(self, body: bytes, max_deltas: Optional[int] = None) -> str:
+        """POST a request body and return the reply content"""
+        content = ""
+        deltas = 0
+        with _SESSION.post(self.url, data=body, timeout=60, stream=True) as response:
+            if not response.headers.get("Content-Type", "").startswith("text/event-stream"):
+                # Errors (and servers that ignore "stream") reply with one JSON body
+                data = _loads(response.content)
+                if "error" in data:
+                    raise Exception(f"API Error: {data['error']['message']}")
+                return data["choices"][0]["message"]["content"]
+
+            response.encoding = "utf-8"  # text/event-stream would otherwise decode as latin-1
+            for line in response.iter_lines(decode_unicode=True):
+                delta = _sse_delta(line)
+                if delta:
+                    content += delta
+                    deltas += 1
+                    # Tool call complete or budget spent - closing the stream stops generation
+                    if _TC_END in content[-len(_TC_END) - len(delta):] or deltas == max_deltas:
+                        break
+        return content
+
+    def _messages_json(self, messages: List[Dict]) -> bytes:
+        """Messages as a JSON array, encoding only messages appended since the last call"""
+        if not self.incremental:
+            return _dumps_bytes(messages)
+        state = self._msgs
+        if getattr(state, "ref", None) is not messages or state.len > len(messages):
+            # A different (or shortened) conversation - start over
+            state.ref = messages
+            state.buf = bytearray(b"[")
+            state.len = 0
+        for message in messages[state.len:]:
+            if state.len:
+                state.buf += b","
+            state.buf += _dumps_bytes(message)
+            state.len += 1
+        return bytes(state.buf + b"]")
+
+
+def _sse_delta(line: str) -> str:
+    """Content delta carried by one SSE line ("" for keep-alives and [DONE])"""
+    if not line.startswith("data:"):
+        return ""
+    data = line[5:].strip()
+    if data == "[DONE]":
+        return ""
+    chunk = _loads(data)
+    if "error" in chunk:
+        raise Exception(f"API Error: {chunk['error']['message']}")
+    choices = chunk.get("choices")
+    if not choices:
+        return ""
+    return choices[0].get("delta", {}).get("content") or ""
+
+
+def encode_tools(tools: List[Dict]) -> bytes:
+    """JSON for a tools list, to encode it once for several ChatAPI calls"""
+    return _dumps_bytes(tools)
+
+
+def extract_tool_calls(content: str) -> List[str]:
+    """Extract tool calls from response"""
+    m = _PAYLOAD_RE.search(content)
+    return _TOOL_CALL_RE.findall(m.group(1)) if m else []
@@ -0,0 +1,338 @@
+"""
+SHARED MCP CHAT CORE
+Async MCP server connection and streamed LLM calls behind the interactive
+chats in mcp_chat.py and mcp_chat_enhanced.py
+"""
+import re
+import asyncio
+import copy
+import hashlib
+import itertools
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+from _tool_loop import _SESSION, _TC_END, _dumps, _dumps_bytes, _loads, _sse_delta
+
+try:
+    import httpx
+except ImportError:  # httpx is optional - async LLM calls fall back to threads
+    httpx = None
+
+# Reply layouts written by the TypeScript and Python MCP SDKs, where "result" can be sliced out
+_RESULT_FIRST = b'{"result":'
+_RESULT_FIRST_TAIL = re.compile(rb',"jsonrpc":"2\.0","id":\d+\}')  # All that may follow the result
+_RESULT_LAST = re.compile(rb'\{"jsonrpc":"2\.0","id":\d+,"result":')
+
+def _slice_result(line: bytes) -> Optional[Tuple[bytes, bytes]]:
+    """(layout, result JSON) cut from a raw reply line, or None when the layout is unknown"""
+    line = line.rstrip()
+    if line.startswith(_RESULT_FIRST):
+        end = line.rfind(b',"jsonrpc":')
+        if end != -1 and _RESULT_FIRST_TAIL.fullmatch(line, end):
+            return _RESULT_FIRST, line[len(_RESULT_FIRST):end]
+    else:
+        head = _RESULT_LAST.match(line)
+        if head is not None and line.endswith(b"}"):
+            return _RESULT_LAST.pattern, line[head.end():-1]
+    return None
+
+class MCPChatCore:
+    """MCP server process, JSON-RPC routing and LLM calls shared by the chat front ends"""
+
+    __slots__ = (
+        "proc", "mcp_tools", "openai_tools", "conversation", "tool_ids", "called_tools",
+        "client", "use_cache", "max_iterations", "max_seconds", "llm_url", "response_cache_size",
+        "max_ctx_chars", "keep_recent_messages", "tool_summary_chars",
+        "_loop", "_mcp_lock", "_pending", "_reader", "_resp_cache", "_result_layouts",
+        "_conv_ref", "_conv_buf", "_conv_len", "_tools_json", "_body_head",
+    )
+
+    def __init__(self, mcp_cmd: List[str], llm_url: str, model: str, temperature: float = 0.7,
+                 use_cache: bool = False, max_iterations: int = 10, max_seconds: Optional[float] = None,
+                 mcp_line_limit: int = 1 << 24, response_cache_size: int = 256,
+                 max_ctx_chars: int = 16_000, keep_recent_messages: int = 6,
+                 tool_summary_chars: int = 200):
+        """
+        use_cache: answer byte-identical requests from an LRU of earlier replies - only
+        meaningful when sampling is deterministic (temperature 0), otherwise a repeated
+        prompt would replay one sampled answer
+        """
+        # Event loop for the async core - the sync API runs on it
+        self._loop = asyncio.new_event_loop()
+
+        # Start MCP server (binary pipes - JSON-RPC lines go to and from bytes directly)
+        self.proc = self._loop.run_until_complete(asyncio.create_subprocess_exec(
+            *mcp_cmd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            limit=mcp_line_limit
+        ))
+        self._mcp_lock = asyncio.Lock()  # One writer on the MCP stdin at a time
+        self._pending: Dict[int, asyncio.Future] = {}  # Request id -> future awaiting its reply
+        self._reader = None  # Background task routing MCP replies by id
+        self._result_layouts: Dict[bytes, bool] = {}  # Reply layout -> slice verified against the parse
+        self.llm_url = llm_url
+        self.use_cache = use_cache
+        self.max_iterations = max_iterations
+        self.max_seconds = max_seconds
+        self.response_cache_size = response_cache_size
+        self.max_ctx_chars = max_ctx_chars
+        self.keep_recent_messages = keep_recent_messages
+        self.tool_summary_chars = tool_summary_chars
+        self._resp_cache: "OrderedDict[bytes, str]" = OrderedDict()  # LRU of LLM replies, shared by forks
+        # Conversation JSON encoded so far: b"[msg0,msg1,..." for the first _conv_len messages
+        self._conv_ref = None
+        self._conv_buf = bytearray()
+        self._conv_len = 0
+
+        # Initialize MCP
+        self._loop.run_until_complete(self._rpc({
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "initialize",
+            "params": {
+                "protocolVersion": "2024-11-05",
+                "capabilities": {},
+                "clientInfo": {"name": "interactive-chat", "version": "1.0"}
+            }
+        }))
+
+        # Get tools
+        tools_response = self._loop.run_until_complete(self._rpc({
+            "jsonrpc": "2.0",
+            "id": 2,
+            "method": "tools/list",
+            "params": {}
+        }))
+        self.mcp_tools = tools_response["result"]["tools"]
+
+        # Convert to OpenAI format
+        self.openai_tools = [
+            {
+                "type": "function",
+                "function": {
+                    "name": t["name"],
+                    "description": t.get("description", ""),
+                    "parameters": t.get("inputSchema", {})
+                }
+            }
+            for t in self.mcp_tools
+        ]
+        # Everything but the messages is fixed for the session - encode it once
+        self._tools_json = _dumps_bytes(self.openai_tools)
+        self._body_head = _dumps_bytes({
+            "model": model,
+            "temperature": temperature,
+            "max_tokens": 512,
+            "stream": True
+        })[:-1] + b',"tools":' + self._tools_json + b',"messages":'
+
+        self.conversation: List[Dict] = []  # Front ends start it with their system message
+        self.tool_ids = itertools.count(101)  # Shared by forked conversations
+        self.called_tools: Set[int] = set()  # Anti-loop
+
+        # Concurrent conversations share one pooled LLM client
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+            timeout=30
+        ) if httpx is not None else None
+
+    def call_tool(self, name: str, args: Dict) -> Dict:
+        """Execute tool via MCP"""
+        return self._loop.run_until_complete(self.call_tool_async(name, args))
+
+    async def call_tool_async(self, name: str, args: Dict, raw: bool = False) -> Union[Dict, str]:
+        """Execute tool via MCP without blocking the event loop
+
+        With raw=True the result comes back as the JSON text the server sent.
+        """
+        reply, line = await self._rpc_line({
+            "jsonrpc": "2.0",
+            "id": next(self.tool_ids),
+            "method": "tools/call",
+            "params": {"name": name, "arguments": args}
+        })
+        if raw:
+            return self._result_json(line, reply["result"])
+        return reply["result"]
+
+    def _result_json(self, line: bytes, result: Dict) -> str:
+        """JSON text of a reply's result, sliced from the raw line once its layout is verified"""
+        sliced = _slice_result(line)
+        if sliced is not None:
+            layout, text = sliced
+            trusted = self._result_layouts.get(layout)
+            if trusted is None:
+                # First reply in this layout - the slice must parse back to the result
+                try:
+                    trusted = _loads(text) == result
+                except ValueError:
+                    trusted = False
+                self._result_layouts[layout] = trusted
+            if trusted:
+                return text.decode()
+        return _dumps(result)
+
+    async def _rpc(self, message: Dict) -> Dict:
+        """Send one JSON-RPC request to the MCP server and await its reply"""
+        reply, _ = await self._rpc_line(message)
+        return reply
+
+    async def _rpc_line(self, message: Dict) -> Tuple[Dict, bytes]:
+        """Send one JSON-RPC request and await its reply, parsed and as the raw line"""
+        if self._reader is None:
+            self._reader = self._loop.create_task(self._read_replies())
+        elif self._reader.done() or self.proc.returncode is not None:
+            # Nothing would resolve the reply - fail now rather than wait forever
+            raise ConnectionError("MCP server closed its output")
+        future = self._loop.create_future()
+        self._pending[message["id"]] = future
+        try:
+            async with self._mcp_lock:
+                self.proc.stdin.write(_dumps_bytes(message) + b"\n")
+                await self.proc.stdin.drain()
+        except BaseException:
+            self._pending.pop(message["id"], None)
+            raise
+        return await future
+
+    async def _read_replies(self):
+        """Read MCP replies as they arrive and resolve the matching request"""
+        try:
+            while True:
+                line = await self.proc.stdout.readline()
+                if not line:
+                    break
+                try:
+                    reply = _loads(line)
+                except ValueError:
+                    continue  # Not JSON-RPC (stray server output) - skip the line
+                if not isinstance(reply, dict):
+                    continue
+                future = self._pending.pop(reply.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result((reply, line))
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("MCP server closed its output"))
+            self._pending.clear()
+
+    async def call_llm(self) -> str:
+        """Return the LLM's reply to the conversation, from the cache when it repeats"""
+        body = self._request_body()
+        if not self.use_cache:
+            return await self._stream_llm(body)
+
+        key = hashlib.blake2b(body, digest_size=16).digest()
+        content = self._resp_cache.get(key)
+        if content is not None:
+            self._resp_cache.move_to_end(key)
+            return content
+
+        content = await self._stream_llm(body)
+        self._resp_cache[key] = content
+        if len(self._resp_cache) > self.response_cache_size:
+            self._resp_cache.popitem(last=False)
+        return content
+
+    def _request_body(self) -> bytes:
+        """JSON body for /chat/completions, reusing the encoded conversation prefix"""
+        return self._body_head + self._conversation_json() + b"}"
+
+    def _conversation_json(self) -> bytes:
+        """The conversation as a JSON array, encoding only messages added since the last call"""
+        conversation = self.conversation
+        if conversation is not self._conv_ref or self._conv_len > len(conversation):
+            # Replaced (/clear, fork), shortened or compacted - start over
+            self._conv_ref = conversation
+            self._conv_buf = bytearray(b"[")
+            self._conv_len = 0
+        for message in conversation[self._conv_len:]:
+            if self._conv_len:
+                self._conv_buf += b","
+            self._conv_buf += _dumps_bytes(message)
+            self._conv_len += 1
+        return self._conv_buf + b"]"
+
+    async def _stream_llm(self, body: bytes) -> str:
+        """Stream the conversation's reply from the LLM and return the message content"""
+        if self.client is None:
+            return await asyncio.to_thread(self._post_llm, body)
+
+        content = ""
+        async with self.client.stream(
+            "POST",
+            f"{self.llm_url}/chat/completions",
+            content=body,
+            headers={"Content-Type": "application/json"}
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                delta = _sse_delta(line)
+                if delta:
+                    content += delta
+                    # Tool call complete - closing the stream stops generation
+                    if _TC_END in content[-len(_TC_END) - len(delta):]:
+                        break
+        return content
+
+    def _post_llm(self, body: bytes) -> str:
+        """Blocking streamed LLM call, used when httpx is not installed"""
+        content = ""
+        with _SESSION.post(
+            f"{self.llm_url}/chat/completions",
+            data=body,
+            timeout=30,
+            stream=True
+        ) as response:
+            response.raise_for_status()
+            response.encoding = "utf-8"  # text/event-stream would otherwise decode as latin-1
+            for line in response.iter_lines(decode_unicode=True):
+                delta = _sse_delta(line)
+                if delta:
+                    content += delta
+                    # Tool call complete - closing the stream stops generation
+                    if _TC_END in content[-len(_TC_END) - len(delta):]:
+                        break
+        return content
+
+    def fork(self):
+        """A chat sharing this one's MCP server and LLM client, with its own history"""
+        chat = copy.copy(self)
+        chat.conversation = [self.conversation[0]]  # System message only
+        chat.called_tools = set()
+        return chat
+
+    def _compact_conversation(self):
+        """Truncate older tool results once the conversation outgrows max_ctx_chars"""
+        if sum(len(m["content"]) for m in self.conversation) <= self.max_ctx_chars:
+            return
+        # System prompt and the most recent messages stay untouched
+        keep = self.tool_summary_chars
+        for message in self.conversation[1:-self.keep_recent_messages]:
+            content = message["content"]
+            if (message["role"] == "tool" and len(content) > keep
+                    and not content.endswith(" bytes elided]")):
+                elided = len(content[keep:].encode())
+                message["content"] = f"{content[:keep]}...[{elided} bytes elided]"
+        self._conv_ref = None  # Messages changed in place - re-encode on the next call
+
+    def cleanup(self):
+        """Clean up resources"""
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                self._loop.run_until_complete(self._reader)
+            except asyncio.CancelledError:
+                pass
+        if self.proc.returncode is None:  # The server may already have exited
+            try:
+                self.proc.terminate()
+                self._loop.run_until_complete(asyncio.wait_for(self.proc.wait(), 2))
+            except:
+                self.proc.kill()
+        if self.client is not None:
+            self._loop.run_until_complete(self.client.aclose())
+        self._loop.close()
+        print("\n✓ MCP Server stopped")
@@ -0,0 +1,259 @@
+"""
+SHARED TOOL LOOP
+LLM -> tool-call parsing -> MCP tool execution, used by mcp_chat.py,
+mcp_chat_enhanced.py and minimal_mcp.py
+"""
+import json
+import re
+import asyncio
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+try:
+    import orjson
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+    def _dumps_bytes(obj) -> bytes:
+        return orjson.dumps(obj)
+
+    def _dumps_sorted(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+
+    _loads = orjson.loads
+except ImportError:  # orjson is optional - fall back to stdlib json
+    def _dumps(obj) -> str:
+        return json.dumps(obj)
+
+    def _dumps_bytes(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+    def _dumps_sorted(obj) -> bytes:
+        return json.dumps(obj, sort_keys=True).encode()
+
+    _loads = json.loads
+
+try:
+    import xxhash
+    _sig_hash = xxhash.xxh3_64_intdigest
+except ImportError:  # xxhash is optional - fall back to the builtin bytes hash
+    _sig_hash = hash
+
+# Filesystem tools without side effects - consecutive calls to these run concurrently
+READ_ONLY_TOOLS = frozenset({
+    "read_file", "read_text_file", "read_media_file", "read_multiple_files",
+    "list_directory", "list_directory_with_sizes", "directory_tree",
+    "search_files", "get_file_info", "list_allowed_directories",
+})
+
+# Shared HTTP session - reuses keep-alive connections to the LLM across calls
+_SESSION = requests.Session()
+_SESSION.headers["Content-Type"] = "application/json"
+_SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+# Tool-call sentinels and patterns, compiled once for the tool loop
+_TC_START = "<|tool_call_start|>"
+_TC_END = "<|tool_call_end|>"
+# Whole tool-call block in one scan; an unterminated block runs to the end
+_TC_BLOCK = re.compile(
+    re.escape(_TC_START) + r'\s*\[?(.*?)\]?\s*(?:' + re.escape(_TC_END) + r'|\Z)', re.DOTALL
+)
+_CALL_RE = re.compile(r'\w+\([^)]*\)')
+
+# Tool-call argument scanning
+_ARG_SEPARATORS = frozenset(" \t\n,")
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r"}
+_UNESCAPE_RE = re.compile(r'\\(.)', re.DOTALL)
+_LITERALS = {"true": True, "True": True, "false": False, "False": False, "null": None, "None": None}
+
+# Tool message for a repeated call - points the model at the result it already has
+_DUPLICATE_RESULT = {"note": "Duplicate call - its result is already in the conversation above, use it"}
+_DUPLICATE_NOTE = _dumps(_DUPLICATE_RESULT)
+MAX_STALLED_ITERATIONS = 2  # Iterations of only duplicate calls tolerated before the loop gives up
+
+# ============================================================
+# PARSING
+# ============================================================
+
+def _parse_args(s: str) -> Dict:
+    """Parse tool-call arguments (key="value", key=3, ...) in one left-to-right pass"""
+    stripped = s.strip()
+    if stripped[:1] in ('{', '"'):  # JSON-style arguments
+        try:
+            args = _loads(stripped if stripped[0] == "{" else "{" + stripped + "}")
+            if isinstance(args, dict):
+                return args
+        except ValueError:
+            pass
+
+    args = {}
+    i, n = 0, len(s)
+    while i < n:
+        # Key
+        while i < n and s[i] in _ARG_SEPARATORS:
+            i += 1
+        start = i
+        while i < n and (s[i].isalnum() or s[i] == "_"):
+            i += 1
+        key = s[start:i]
+        while i < n and s[i] in " \t":
+            i += 1
+        if not key or i >= n or s[i] != "=":
+            # Not key=value - skip to the next argument
+            comma = s.find(",", i)
+            i = n if comma == -1 else comma + 1
+            continue
+        i += 1
+        while i < n and s[i] in " \t":
+            i += 1
+
+        # Value: quoted string (backslash escapes allowed) or bareword/number
+        if i < n and s[i] in "\"'":
+            quote = s[i]
+            i += 1
+            end = s.find(quote, i)
+            while end != -1 and _escaped(s, i, end):
+                end = s.find(quote, end + 1)
+            if end == -1:
+                end = n
+            raw = s[i:end]
+            args[key] = _UNESCAPE_RE.sub(_unescape, raw) if "\\" in raw else raw
+            i = end + 1
+        else:
+            comma = s.find(",", i)
+            end = n if comma == -1 else comma
+            args[key] = _bare_value(s[i:end].strip())
+            i = end + 1
+    return args
+
+def _escaped(s: str, start: int, pos: int) -> bool:
+    """Whether s[pos] is preceded by an odd run of backslashes (within s[start:pos])"""
+    k = pos
+    while k > start and s[k - 1] == "\\":
+        k -= 1
+    return (pos - k) % 2 == 1
+
+def _unescape(match) -> str:
+    return _ESCAPES.get(match.group(1), match.group(1))
+
+def _bare_value(token: str):
+    """Unquoted argument value: literal, int, float, or the token itself"""
+    if token in _LITERALS:
+        return _LITERALS[token]
+    try:
+        return int(token)
+    except ValueError:
+        pass
+    try:
+        return float(token)
+    except ValueError:
+        return token
+
+def split_call(call: str) -> Tuple[str, Dict]:
+    """Split a matched `name(args)` tool call into its name and argument dict"""
+    open_paren = call.index("(")
+    return call[:open_paren], _parse_args(call[open_paren + 1:call.rindex(")")])
+
+def _sse_delta(line: str) -> str:
+    """Content delta carried by one SSE line ("" for keep-alives and [DONE])"""
+    if not line.startswith("data:"):
+        return ""
+    data = line[5:].strip()
+    if data == "[DONE]":
+        return ""
+    choices = _loads(data).get("choices")
+    if not choices:
+        return ""
+    return choices[0].get("delta", {}).get("content") or ""
+
+# ============================================================
+# TOOL LOOP
+# ============================================================
+
+async def _gather_into(group: Dict, contents: List):
+    """Run a group of tool calls concurrently, storing each result at its call position"""
+    for i, content in zip(group, await asyncio.gather(*group.values())):
+        contents[i] = content
+    group.clear()
+
+async def run_tool_loop(
+    conversation: List[Dict],
+    call_llm: Callable[[], Awaitable[str]],
+    run_tool: Callable[[str, Dict], Awaitable[str]],
+    called_tools: Set[int],
+    *,
+    max_iterations: int = 10,
+    max_seconds: Optional[float] = None,
+    on_iteration: Optional[Callable[[int], None]] = None,
+    on_tool_calls: Optional[Callable[[int, List[str]], None]] = None,
+    on_duplicate: Optional[Callable[[str, Dict], str]] = None,
+    after_tools: Optional[Callable[[], None]] = None,
+) -> Optional[str]:
+    """Alternate LLM calls and tool execution until the model answers without tools
+
+    call_llm returns the reply to the current conversation; run_tool executes one
+    call and returns the tool message content. Both replies and tool results are
+    appended to the conversation. Returns the final answer. The loop gives up after
+    max_iterations, once max_seconds have passed, or after MAX_STALLED_ITERATIONS
+    iterations in a row that only repeat calls already made (each answered with
+    _DUPLICATE_NOTE); it then returns the text of the last reply outside its
+    tool-call block, or None when there is none.
+    """
+    deadline = None if max_seconds is None else time.monotonic() + max_seconds
+    reply = ""  # Last assistant reply that asked for tools
+    stalled = 0
+    for iteration in range(max_iterations):
+        if on_iteration is not None:
+            on_iteration(iteration)
+
+        content = await call_llm()
+        conversation.append({"role": "assistant", "content": content})
+
+        # No tool-call block - this is the final answer
+        block = _TC_BLOCK.search(content)
+        if block is None:
+            return content
+
+        reply = content
+        tool_calls = _CALL_RE.findall(block.group(1))
+        if on_tool_calls is not None:
+            on_tool_calls(iteration, tool_calls)
+
+        # Execute tools - consecutive read-only calls run concurrently,
+        # a call that may modify files waits for the ones before it
+        contents = [None] * len(tool_calls)
+        group = {}
+        known_calls = len(called_tools)
+        for i, call in enumerate(tool_calls):
+            name, args = split_call(call)
+
+            # Anti-loop: skip if already called
+            call_signature = _sig_hash(name.encode() + b"|" + _dumps_sorted(args))
+            if call_signature in called_tools:
+                contents[i] = _DUPLICATE_NOTE if on_duplicate is None else on_duplicate(name, args)
+                continue
+            called_tools.add(call_signature)
+
+            if name in READ_ONLY_TOOLS:
+                group[i] = run_tool(name, args)
+            else:
+                await _gather_into(group, contents)
+                contents[i] = await run_tool(name, args)
+        await _gather_into(group, contents)
+
+        for content in contents:
+            conversation.append({"role": "tool", "content": content})
+        if after_tools is not None:
+            after_tools()
+
+        # Fixed point - every call was a duplicate, again and again - or out of time
+        stalled = stalled + 1 if len(called_tools) == known_calls else 0
+        if stalled >= MAX_STALLED_ITERATIONS:
+            break
+        if deadline is not None and time.monotonic() > deadline:
+            break
+
+    return _TC_BLOCK.sub("", reply).strip() or None
@@ -11,13 +11,51 @@ Flow:
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 from typing import List, Dict, Optional, Tuple
 import re
+import sys
+import logging
+
+
+logger = logging.getLogger("cycles")
+
+
+def _force_verbose():
+    """Make verbose output visible even when the host never configured logging"""
+    if not logger.isEnabledFor(logging.INFO):
+        logger.setLevel(logging.INFO)
+    if not logger.hasHandlers():
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
 
 
 BASE_URL = "http://localhost:8080/v1"
 MODEL_NAME = "LFM2-8B-A1B-BF16-cuda"
+_URL = f"{BASE_URL}/chat/completions"
+
+# Shared HTTP session - reuses keep-alive connections across tool cycles
+_SESSION = requests.Session()
+_SESSION.headers.update({"Connection": "keep-alive"})
+_ADAPTER = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=2, backoff_factor=0.1, status_forcelist=[502, 503, 504])
+)
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.mount("https://", _ADAPTER)
+
+# Tool-call sentinels and call pattern, hoisted out of extract_tool_calls
+_TC_START = "<|tool_call_start|>"
+_TC_END = "<|tool_call_end|>"
+# Delimited payload with optional [ ] and padding, captured in one search
+_PAYLOAD_RE = re.compile(
+    re.escape(_TC_START) + r'\s*\[?(.*?)\]?\s*' + re.escape(_TC_END), re.DOTALL
+)
+_TOOL_CALL_RE = re.compile(r'\w+\([^)]*\)')
 
 
 def call_api(messages: List[Dict], tools: Optional[List[Dict]] = None) -> str:
@@ -31,7 +69,7 @@ def call_api(messages: List[Dict], tools: Optional[List[Dict]] = None) -> str:
     if tools:
         payload["tools"] = tools
     
-    response = requests.post(f"{BASE_URL}/chat/completions", json=payload)
+    response = _SESSION.post(_URL, json=payload, timeout=60)
     data = response.json()
     
     if "error" in data:
@@ -42,19 +80,9 @@ def call_api(messages: List[Dict], tools: Optional[List[Dict]] = None) -> str:
 
 def extract_tool_calls(content: str) -> List[str]:
     """Extract tool calls from model response"""
-    if "<|tool_call_start|>" not in content:
-        return []
-    
-    start = content.find("<|tool_call_start|>") + len("<|tool_call_start|>")
-    end = content.find("<|tool_call_end|>")
-    if end == -1:
-        return []
-    
-    calls_str = content[start:end].strip().strip("[]")
-    if not calls_str:
-        return []
-    
-    return re.findall(r'\w+\([^)]*\)', calls_str)
+    m = _PAYLOAD_RE.search(content)
+    # Scan the captured payload in place - no slice/strip copies
+    return _TOOL_CALL_RE.findall(content, m.start(1), m.end(1)) if m else []
 
 
 def mock_tool_execution(tool_call: str) -> str:
@@ -104,6 +132,9 @@ def run_tool_cycle(
     2. Execute tool → Get result  
     3. Result → Natural language response
     
+    verbose: log each step to the "cycles" logger at INFO - forced visible on
+    stdout when logging is not configured
+    
     Returns: (tool_call_response, extracted_calls, final_response)
     """
     if conversation is None:
@@ -113,21 +144,20 @@ def run_tool_cycle(
     conversation.append({"role": "user", "content": user_query})
     
     if verbose:
-        print(f"\n{'='*60}")
-        print(f"USER: {user_query}")
-        print(f"{'='*60}")
+        _force_verbose()
+        logger.info("\n%s\nUSER: %s\n%s", "=" * 60, user_query, "=" * 60)
     
     # Step 2: Model generates tool call
     tool_call_response = call_api(conversation, tools)
     calls = extract_tool_calls(tool_call_response)
     
     if verbose:
-        print(f"MODEL TOOL CALL: {calls if calls else 'No tool call'}")
+        logger.info("MODEL TOOL CALL: %s", calls if calls else "No tool call")
     
     if not calls:
         # No tool call, model answered directly
         if verbose:
-            print(f"MODEL RESPONSE: {tool_call_response}")
+            logger.info("MODEL RESPONSE: %s", tool_call_response)
         return tool_call_response, [], tool_call_response
     
     # Step 3: Execute tool(s)
@@ -136,14 +166,14 @@ def run_tool_cycle(
     for call in calls:
         tool_result = mock_tool_execution(call)
         if verbose:
-            print(f"TOOL RESULT: {tool_result}")
+            logger.info("TOOL RESULT: %s", tool_result)
         conversation.append({"role": "tool", "content": tool_result})
     
     # Step 4: Model interprets result and responds
     final_response = call_api(conversation, tools)
     
     if verbose:
-        print(f"MODEL FINAL: {final_response}")
+        logger.info("MODEL FINAL: %s", final_response)
     
     conversation.append({"role": "assistant", "content": final_response})
     
@@ -315,6 +345,8 @@ def test_tool_result_usage():
 
 def main():
     """Run all tests"""
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     print("="*60)
     print("TOOL CALLING TEST SUITE - CLEAN ARCHITECTURE")
     print("="*60)
@@ -5,11 +5,66 @@ Handles 8-step chain limit with multi-phase approach
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import gzip
+import hashlib
 import time
-from typing import List, Dict, Optional
+import asyncio
+import copy
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
+from collections import Counter, OrderedDict
+from itertools import islice
 import re
+import logging
+
+try:
+    import orjson
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+    def _dumps_pretty(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
+    def _dumps_bytes(obj) -> bytes:
+        return orjson.dumps(obj)
+
+    def _dump_file(obj, path: str):
+        with open(path, 'wb') as f:  # bytes straight to disk, no str copy
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+
+    _loads = orjson.loads
+except ImportError:  # orjson is optional - fall back to stdlib json
+    def _dumps(obj) -> str:
+        return json.dumps(obj)
+
+    def _dumps_pretty(obj) -> str:
+        return json.dumps(obj, indent=2)
+
+    def _dumps_bytes(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+    def _dump_file(obj, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(obj, f, indent=2)  # streamed chunk by chunk
+
+    _loads = json.loads
+
+try:
+    import httpx
+except ImportError:  # httpx is optional - async paths fall back to threads
+    httpx = None
+
+try:
+    import h2  # noqa: F401 - enables HTTP/2 in httpx
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
 
 # ============================================================
 # CONFIGURATION
@@ -25,6 +80,40 @@ MAX_CHAIN_DEPTH = 6  # Conservative limit
 MAX_SEARCH_RESULTS_PER_QUERY = 8
 MAX_PHASES = 4
 
+# Gzip LLM request bodies - only if the server accepts Content-Encoding: gzip
+GZIP_REQUESTS = False
+
+# Completed LLM responses kept per request body (0 disables the cache) - only
+# temperature-0 calls, or callers passing use_cache=True, are cached
+LLM_CACHE_SIZE = 512
+
+# Shared HTTP session - LLM and Brave calls reuse pooled keep-alive connections
+_SESSION = requests.Session()
+_SESSION.headers.update({"Connection": "keep-alive"})
+_ADAPTER = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=2, backoff_factor=0.1, status_forcelist=[502, 503, 504])
+)
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.mount("https://", _ADAPTER)
+
+# Tool-call sentinels and call pattern, hoisted out of extract_tool_calls
+_TC_START = "<|tool_call_start|>"
+_TC_END = "<|tool_call_end|>"
+_TC_START_LEN = len(_TC_START)
+_TC_END_LEN = len(_TC_END)
+_TOOL_CALL_RE = re.compile(r'\w+\([^)]*\)')
+logger = logging.getLogger("deep_researcher")
+_RULE = "=" * 70
+
+_PARAM_RE = re.compile(r'(\w+)=(?:"([^"]*)"|\'([^\']*)\'|(\d+))')
+_SENT_RE = re.compile(r'[.!?]+')
+
+# LLM response cache: blake2b digest of the request body -> response text, least recently used first
+_LLM_CACHE: "OrderedDict[bytes, str]" = OrderedDict()
+_LLM_CACHE_LOCK = threading.Lock()  # written from the parallel phase-2 chains
+
 
 # ============================================================
 # BRAVE SEARCH API
@@ -54,7 +143,7 @@ class BraveSearchAPI:
             params["freshness"] = freshness
         
         try:
-            response = requests.get(
+            response = _SESSION.get(
                 BRAVE_SEARCH_URL,
                 headers=self.headers,
                 params=params,
@@ -64,9 +153,53 @@ class BraveSearchAPI:
             return response.json()
         
         except requests.exceptions.RequestException as e:
-            print(f"✗ Brave API Error: {str(e)}")
+            logger.error("✗ Brave API Error: %s", e)
+            return {"web": {"results": []}}
+    
+    async def search_async(self, query: str, count: int = 10, freshness: Optional[str] = None,
+                           client: Optional["httpx.AsyncClient"] = None) -> Dict:
+        """
+        Async search - concurrent searches share the client's connections
+        (multiplexed over one socket with HTTP/2); without a client the sync
+        search runs in a worker thread
+        """
+        if client is None:
+            return await asyncio.to_thread(self.search, query, count, freshness)
+        
+        params = {
+            "q": query,
+            "count": min(count, 20)  # Brave max is 20
+        }
+        
+        if freshness:
+            params["freshness"] = freshness
+        
+        try:
+            response = await client.get(
+                BRAVE_SEARCH_URL,
+                headers=self.headers,
+                params=params,
+                timeout=10
+            )
+            response.raise_for_status()
+            return response.json()
+        
+        except httpx.HTTPError as e:
+            logger.error("✗ Brave API Error: %s", e)
             return {"web": {"results": []}}
     
+    async def search_batch(self, queries: List[str], count: int = 10,
+                           freshness: Optional[str] = None) -> List[Dict]:
+        """Run independent searches concurrently on one pooled client"""
+        client = new_async_client()
+        try:
+            return await asyncio.gather(
+                *(self.search_async(q, count, freshness, client) for q in queries)
+            )
+        finally:
+            if client is not None:
+                await client.aclose()
+    
     def format_results(self, search_response: Dict) -> List[Dict]:
         """Format Brave results into clean structure"""
         results = []
@@ -89,53 +222,224 @@ class BraveSearchAPI:
 # LLM API
 # ============================================================
 def call_llm(messages: List[Dict], tools: Optional[List[Dict]] = None, 
-             temperature: float = 0.1) -> str:
-    """Call local LLM API"""
+             temperature: float = 0.1,
+             messages_json: Optional[List[bytes]] = None,
+             use_cache: Optional[bool] = None) -> str:
+    """
+    Call local LLM API
+    messages_json: messages already encoded one by one (see encode_message),
+    so a growing conversation is not re-serialized on every call
+    use_cache: serve repeated requests from _LLM_CACHE (default: only at temperature 0,
+    where a cached reply is what the server would return anyway)
+    """
+    
+    raw = _build_body(messages, tools, temperature, messages_json)
+    key = _cache_key(raw) if _caching(temperature, use_cache) else None
+    cached = _cached_response(key)
+    if cached is not None:
+        return cached
     
+    body, headers = _encode_request(raw)
+    try:
+        response = _SESSION.post(
+            f"{LLM_BASE_URL}/chat/completions",
+            data=body,
+            headers=headers,
+            timeout=30,
+            stream=True
+        )
+        response.raise_for_status()
+        return _cache_response(key, _read_stream(response))
+    
+    except requests.exceptions.RequestException as e:
+        raise Exception(f"LLM API Error: {str(e)}")
+
+
+async def call_llm_async(messages: List[Dict], tools: Optional[List[Dict]] = None,
+                         temperature: float = 0.1,
+                         client: Optional["httpx.AsyncClient"] = None,
+                         messages_json: Optional[List[bytes]] = None,
+                         use_cache: Optional[bool] = None) -> str:
+    """Async call_llm on a shared client; falls back to a worker thread"""
+    if client is None:
+        return await asyncio.to_thread(call_llm, messages, tools, temperature, messages_json, use_cache)
+    
+    raw = _build_body(messages, tools, temperature, messages_json)
+    key = _cache_key(raw) if _caching(temperature, use_cache) else None
+    cached = _cached_response(key)
+    if cached is not None:
+        return cached
+    
+    body, headers = _encode_request(raw)
+    stream = _ToolCallStream()
+    try:
+        async with client.stream(
+            "POST",
+            f"{LLM_BASE_URL}/chat/completions",
+            content=body,
+            headers=headers,
+            timeout=30
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line.startswith("data: ") and stream.feed(line[6:]):
+                    break
+        return _cache_response(key, stream.text())
+    
+    except httpx.HTTPError as e:
+        raise Exception(f"LLM API Error: {str(e)}")
+
+
+def encode_message(message: Dict) -> bytes:
+    """Encode one chat message for the messages_json argument of call_llm"""
+    return _dumps_bytes(message)
+
+
+def _build_body(messages: List[Dict], tools: Optional[List[Dict]], temperature: float,
+                messages_json: Optional[List[bytes]] = None) -> bytes:
+    """Uncompressed request body with the encoded messages spliced in"""
     payload = {
         "model": MODEL_NAME,
-        "messages": messages,
         "temperature": temperature,
-        "max_tokens": 1024
+        "max_tokens": 1024,
+        "stream": True
     }
     
     if tools:
         payload["tools"] = tools
     
+    if messages_json is None:
+        messages_json = [encode_message(m) for m in messages]
+    
+    return _dumps_bytes(payload)[:-1] + b',"messages":[' + b",".join(messages_json) + b"]}"
+
+
+def _encode_request(body: bytes) -> Tuple[bytes, Dict]:
+    """Request body and its headers, gzipped if GZIP_REQUESTS"""
+    headers = {"Content-Type": "application/json"}
+    if GZIP_REQUESTS:
+        body = gzip.compress(body, compresslevel=3)
+        headers["Content-Encoding"] = "gzip"
+    return body, headers
+
+
+def _cache_key(body: bytes) -> bytes:
+    """Content address of an uncompressed request body (model, messages, tools)"""
+    return hashlib.blake2b(body, digest_size=16).digest()
+
+
+def _caching(temperature: float, use_cache: Optional[bool]) -> bool:
+    """Whether a call goes through _LLM_CACHE - sampled replies are only cached on request"""
+    if LLM_CACHE_SIZE <= 0:
+        return False
+    return temperature == 0 if use_cache is None else use_cache
+
+
+def _cached_response(key: Optional[bytes]) -> Optional[str]:
+    """Cached response for a request key (None when not caching), marked recently used"""
+    if key is None:
+        return None
+    with _LLM_CACHE_LOCK:
+        content = _LLM_CACHE.get(key)
+        if content is not None:
+            _LLM_CACHE.move_to_end(key)
+        return content
+
+
+def _cache_response(key: Optional[bytes], content: str) -> str:
+    """Store a response, evicting the least recently used entry once LLM_CACHE_SIZE is hit"""
+    if key is not None:
+        with _LLM_CACHE_LOCK:
+            _LLM_CACHE[key] = content
+            _LLM_CACHE.move_to_end(key)
+            if len(_LLM_CACHE) > LLM_CACHE_SIZE:
+                _LLM_CACHE.popitem(last=False)
+    return content
+
+
+def new_async_client() -> Optional["httpx.AsyncClient"]:
+    """Pooled async client (HTTP/2 when h2 is installed), or None without httpx"""
+    if httpx is None:
+        return None
+    return httpx.AsyncClient(
+        http2=_HTTP2,
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
+    )
+
+
+def _run_sync(coro):
+    """
+    Run a coroutine to completion from sync code. Inside a running event loop
+    (Jupyter, async hosts) asyncio.run would raise, so it gets its own loop on a
+    worker thread instead - async callers can await the *_async methods directly
+    """
     try:
-        response = requests.post(
-            f"{LLM_BASE_URL}/chat/completions",
-            json=payload,
-            timeout=30
-        )
-        response.raise_for_status()
-        data = response.json()
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
+
+
+class _ToolCallStream:
+    """Accumulates streamed content deltas and spots the tool-call end sentinel"""
+    
+    def __init__(self):
+        self.parts = []
+        self.tail = ""  # Carries a sentinel split across two deltas
+    
+    def feed(self, chunk) -> bool:
+        """Feed one SSE data payload (str or bytes); True once reading can stop"""
+        if chunk in (b"[DONE]", "[DONE]"):
+            return True
         
+        data = _loads(chunk)
         if "error" in data:
             raise Exception(f"LLM Error: {data['error']['message']}")
-        
-        return data["choices"][0]["message"]["content"]
+        if not data.get("choices"):
+            return False
+        
+        delta = data["choices"][0].get("delta", {}).get("content")
+        if not delta:
+            return False
+        self.parts.append(delta)
+        
+        window = self.tail + delta
+        if _TC_END in window:
+            return True
+        self.tail = window[-_TC_END_LEN:]
+        return False
     
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"LLM API Error: {str(e)}")
+    def text(self) -> str:
+        return "".join(self.parts)
+
+
+def _read_stream(response: requests.Response) -> str:
+    """Accumulate SSE content deltas, stopping as soon as a tool call closes"""
+    stream = _ToolCallStream()
+    try:
+        for line in response.iter_lines():
+            if line.startswith(b"data: ") and stream.feed(line[6:]):
+                break
+    finally:
+        response.close()
+    
+    return stream.text()
 
 
 def extract_tool_calls(content: str) -> List[str]:
     """Extract tool calls from LLM response"""
-    if "<|tool_call_start|>" not in content:
+    start = content.find(_TC_START)
+    if start == -1:
         return []
     
-    start = content.find("<|tool_call_start|>") + len("<|tool_call_start|>")
-    end = content.find("<|tool_call_end|>")
-    
+    start += _TC_START_LEN
+    end = content.find(_TC_END, start)
     if end == -1:
         return []
     
-    calls_str = content[start:end].strip().strip("[]")
-    if not calls_str:
-        return []
-    
-    return re.findall(r'\w+\([^)]*\)', calls_str)
+    # Scan the delimited region in place - no slice/strip copies
+    return _TOOL_CALL_RE.findall(content, start, end)
 
 
 # ============================================================
@@ -149,34 +453,55 @@ class ResearchState:
         self.phases_completed = 0
         self.findings = []
         self.sources = []
+        self._seen_urls: set = set()  # O(1) dedupe for add_sources
+        # Lowercased title+description word sets, parallel to self.sources
+        # (kept out of the source dicts, which are serialized as-is)
+        self.source_tokens: List[frozenset] = []
+        # Lowercased title words longer than 5 chars, parallel to self.sources
+        self.title_themes: List[frozenset] = []
+        # Running counts of candidate angle keywords across all sources
+        self.keyword_counts: Counter = Counter()
         self.key_angles = []
         self.searches_executed = []
         self.current_phase_data = {}
+        self._lock = threading.Lock()  # parallel phase-2 chains share this state
     
-    def add_finding(self, finding: Dict):
-        """Add a research finding"""
-        self.findings.append({
-            **finding,
-            "timestamp": datetime.now().isoformat(),
-            "phase": self.phases_completed
-        })
+    def add_finding(self, finding: Dict, timestamp: Optional[str] = None):
+        """Add a research finding (timestamp: reuse a per-step ISO stamp)"""
+        with self._lock:
+            self.findings.append({
+                **finding,
+                "timestamp": timestamp or datetime.now().isoformat(),
+                "phase": self.phases_completed
+            })
     
     def add_sources(self, sources: List[Dict]):
         """Add sources"""
-        for source in sources:
-            if source['url'] not in [s['url'] for s in self.sources]:
-                self.sources.append(source)
+        with self._lock:
+            for source in sources:
+                url = source['url']
+                if url not in self._seen_urls:
+                    self._seen_urls.add(url)
+                    self.sources.append(source)
+                    words = (source['title'] + " " + source['description']).lower().split()
+                    self.source_tokens.append(frozenset(words))
+                    self.title_themes.append(frozenset(
+                        w for w in source['title'].lower().split() if len(w) > 5
+                    ))
+                    self.keyword_counts.update(
+                        w for w in words if len(w) > 5 and w.isalpha()
+                    )
     
     def get_summary(self) -> str:
         """Get current state summary"""
-        return json.dumps({
+        return _dumps_pretty({
             "topic": self.topic,
             "phases_completed": self.phases_completed,
             "findings_count": len(self.findings),
             "sources_count": len(self.sources),
             "key_angles": self.key_angles,
             "searches_executed": len(self.searches_executed)
-        }, indent=2)
+        })
     
     def complete_phase(self):
         """Mark phase as complete"""
@@ -193,6 +518,14 @@ class ResearchToolExecutor:
     def __init__(self, brave_api: BraveSearchAPI, research_state: ResearchState):
         self.brave = brave_api
         self.state = research_state
+        # Tool routing table, bound once rather than on every call
+        self._handlers = {
+            "brave_search": self._brave_search,
+            "extract_key_facts": self._extract_key_facts,
+            "identify_angles": self._identify_angles,
+            "cross_reference": self._cross_reference,
+            "generate_follow_up": self._generate_follow_up,
+        }
     
     def execute(self, tool_call: str) -> str:
         """Execute a tool call"""
@@ -201,51 +534,78 @@ class ResearchToolExecutor:
         tool_name = tool_call.split("(")[0]
         params = self._extract_params(tool_call)
         
-        print(f"  → Executing: {tool_name}")
-        print(f"    Params: {params}")
+        logger.info("  → Executing: %s", tool_name)
+        logger.debug("    Params: %s", params)
         
         # Route to appropriate handler
-        handlers = {
-            "brave_search": self._brave_search,
-            "extract_key_facts": self._extract_key_facts,
-            "identify_angles": self._identify_angles,
-            "cross_reference": self._cross_reference,
-            "generate_follow_up": self._generate_follow_up,
-        }
-        
-        handler = handlers.get(tool_name)
+        handler = self._handlers.get(tool_name)
         if not handler:
-            return json.dumps({"error": f"Unknown tool: {tool_name}"})
+            return _dumps({"error": f"Unknown tool: {tool_name}"})
         
         result = handler(params)
         
         # Track search
         if tool_name == "brave_search":
-            self.state.searches_executed.append({
-                "query": params.get("query", ""),
-                "timestamp": datetime.now().isoformat(),
-                "results_count": len(result.get("results", []))
-            })
+            self._track_search(params, result)
+        
+        return _dumps(result)
+    
+    async def execute_async(self, tool_call: str,
+                            client: Optional["httpx.AsyncClient"] = None) -> str:
+        """
+        Execute a tool call - Brave searches await the network so several can
+        be in flight at once; all other tools are local and run synchronously
+        """
+        if not tool_call.startswith("brave_search("):
+            return self.execute(tool_call)
+        
+        params = self._extract_params(tool_call)
         
-        return json.dumps(result)
+        logger.info("  → Executing: brave_search")
+        logger.debug("    Params: %s", params)
+        
+        query, count, freshness = self._search_args(params)
+        raw_results = await self.brave.search_async(query, count, freshness, client)
+        result = self._record_search(query, raw_results)
+        self._track_search(params, result)
+        
+        return _dumps(result)
+    
+    def prefetch_searches(self, queries: List[str]) -> List[Dict]:
+        """Run several searches as one concurrent batch and record them"""
+        logger.info("  → Batch searching Brave: %s", queries)
+        
+        batch = _run_sync(self.brave.search_batch(queries, MAX_SEARCH_RESULTS_PER_QUERY))
+        
+        results = []
+        for query, raw_results in zip(queries, batch):
+            result = self._record_search(query, raw_results)
+            self._track_search({"query": query}, result)
+            results.append(result)
+        return results
+    
+    def _track_search(self, params: Dict, result: Dict):
+        """Record an executed search in the research state"""
+        self.state.searches_executed.append({
+            "query": params.get("query", ""),
+            "timestamp": datetime.now().isoformat(),
+            "results_count": len(result.get("results", []))
+        })
     
     def _extract_params(self, tool_call: str) -> Dict:
         """Extract parameters from tool call string"""
         params = {}
         
-        # Simple regex-based extraction
-        param_pattern = r'(\w+)=(?:"([^"]*)"|\'([^\']*)\'|(\d+))'
-        matches = re.findall(param_pattern, tool_call)
-        
-        for match in matches:
-            key = match[0]
-            value = match[1] or match[2] or match[3]
+        for match in _PARAM_RE.finditer(tool_call):
+            key, double_quoted, single_quoted, number = match.groups()
             
-            # Try to convert to int if it's a number
-            try:
-                value = int(value)
-            except (ValueError, TypeError):
-                pass
+            if number is not None:
+                value = int(number)
+            else:
+                value = double_quoted if double_quoted is not None else single_quoted
+                # Quoted numbers are still converted to int
+                if value.isascii() and value.isdigit():
+                    value = int(value)
             
             params[key] = value
         
@@ -253,19 +613,28 @@ class ResearchToolExecutor:
     
     def _brave_search(self, params: Dict) -> Dict:
         """Execute Brave search"""
+        query, count, freshness = self._search_args(params)
+        raw_results = self.brave.search(query, count, freshness)
+        return self._record_search(query, raw_results)
+    
+    def _search_args(self, params: Dict) -> Tuple[str, int, Optional[str]]:
+        """Resolve (query, count, freshness) for a brave_search call"""
         query = params.get("query", "")
         count = params.get("count", MAX_SEARCH_RESULTS_PER_QUERY)
         freshness = params.get("freshness")
         
-        print(f"    Searching Brave: '{query}' (count={count})")
+        logger.info("    Searching Brave: '%s' (count=%s)", query, count)
         
-        raw_results = self.brave.search(query, count, freshness)
+        return query, count, freshness
+    
+    def _record_search(self, query: str, raw_results: Dict) -> Dict:
+        """Format raw Brave results and add them to the research state"""
         formatted_results = self.brave.format_results(raw_results)
         
         # Add to state
         self.state.add_sources(formatted_results)
         
-        print(f"    ✓ Found {len(formatted_results)} results")
+        logger.info("    ✓ Found %d results", len(formatted_results))
         
         return {
             "query": query,
@@ -275,30 +644,38 @@ class ResearchToolExecutor:
     
     def _extract_key_facts(self, params: Dict) -> Dict:
         """Extract key facts from search results"""
-        result_ids = params.get("result_ids", [])
+        result_ids = set(params.get("result_ids", []))
         
-        # Get results from state
-        results = [s for s in self.state.sources if s['id'] in result_ids]
+        # Get results from state (sources are unique by URL, see add_sources)
+        results = [
+            (s, title_themes)
+            for s, title_themes in zip(self.state.sources, self.state.title_themes)
+            if s['id'] in result_ids
+        ]
         
         # Simple extraction - in real system, this could use LLM
         facts = []
         themes = set()
         
-        for result in results:
+        for result, title_themes in results:
             # Extract sentences from description
             desc = result.get("description", "")
-            sentences = [s.strip() for s in desc.split(".") if len(s.strip()) > 20]
+            sentences = (s.strip() for s in _SENT_RE.split(desc))
+            sentences = (s for s in sentences if len(s) > 20)
             
-            for sentence in sentences[:2]:  # Top 2 sentences per result
+            for sentence in islice(sentences, 2):  # Top 2 sentences per result
                 facts.append({
                     "fact": sentence,
                     "source_url": result['url'],
                     "source_title": result['title']
                 })
             
-            # Simple theme extraction from title
-            title_words = result['title'].lower().split()
-            themes.update([w for w in title_words if len(w) > 5])
+            # Simple theme extraction from title (tokenized in add_sources)
+            themes |= title_themes
+            
+            # Only the top 10 facts and 5 themes are returned
+            if len(facts) >= 10 and len(themes) >= 5:
+                break
         
         return {
             "facts": facts[:10],  # Top 10 facts
@@ -311,20 +688,9 @@ class ResearchToolExecutor:
         context = params.get("context", "")
         max_angles = params.get("max_angles", 3)
         
-        # Analyze current sources for angles
-        all_titles = [s['title'] for s in self.state.sources]
-        all_descriptions = [s['description'] for s in self.state.sources]
-        
-        # Simple keyword extraction
-        words = {}
-        for text in all_titles + all_descriptions:
-            for word in text.lower().split():
-                if len(word) > 5 and word.isalpha():
-                    words[word] = words.get(word, 0) + 1
-        
-        # Top keywords become angles
-        top_keywords = sorted(words.items(), key=lambda x: x[1], reverse=True)[:max_angles]
-        angles = [kw[0] for kw in top_keywords]
+        # Top keywords across current sources become angles - the counts are
+        # kept up to date by ResearchState.add_sources
+        angles = [kw for kw, _ in self.state.keyword_counts.most_common(max_angles)]
         
         self.state.key_angles = angles
         
@@ -342,21 +708,21 @@ class ResearchToolExecutor:
         mentions = 0
         mentioning_sources = []
         
-        for source in self.state.sources:
-            text = (source['title'] + " " + source['description']).lower()
-            
-            # Simple substring check (could be more sophisticated)
-            fact_words = set(fact.lower().split())
-            if len(fact_words) > 0:
-                text_words = set(text.split())
-                overlap = len(fact_words & text_words) / len(fact_words)
-                
-                if overlap > 0.5:  # 50% word overlap
+        # Word overlap against each source's precomputed token set; stop once
+        # the fact is verified and the 5 reported sources are found
+        enough = max(min_sources, 5)
+        fact_words = set(fact.lower().split())
+        if fact_words:
+            threshold = len(fact_words) / 2  # 50% word overlap
+            for source, text_words in zip(self.state.sources, self.state.source_tokens):
+                if len(fact_words & text_words) > threshold:
                     mentions += 1
                     mentioning_sources.append({
                         "url": source['url'],
                         "title": source['title']
                     })
+                    if mentions >= enough:
+                        break
         
         verified = mentions >= min_sources
         
@@ -520,6 +886,7 @@ class DeepResearchOrchestrator:
         self.brave = BraveSearchAPI(brave_api_key)
         self.state = None
         self.conversation = []
+        self._conv_json: List[bytes] = []  # encoded self.conversation, message by message
         self.chain_depth = 0
     
     def research(self, topic: str, max_depth: int = 3) -> Dict:
@@ -528,34 +895,28 @@ class DeepResearchOrchestrator:
         max_depth: 1=quick, 2=moderate, 3=deep
         """
         
-        print("\n" + "="*70)
-        print(f"DEEP RESEARCH: {topic}")
-        print("="*70)
+        logger.info("\n%s\nDEEP RESEARCH: %s\n%s", _RULE, topic, _RULE)
         
         # Initialize state
         self.state = ResearchState(topic)
         self.executor = ResearchToolExecutor(self.brave, self.state)
         
         # Phase 1: Exploration
-        print(f"\n📍 PHASE 1: EXPLORATION")
-        print("-" * 70)
+        logger.info("\n📍 PHASE 1: EXPLORATION\n%s", "-" * 70)
         self._phase_1_exploration(topic)
         
         # Phase 2: Deep Dives
         if max_depth >= 2:
-            print(f"\n📍 PHASE 2: DEEP INVESTIGATION")
-            print("-" * 70)
+            logger.info("\n📍 PHASE 2: DEEP INVESTIGATION\n%s", "-" * 70)
             self._phase_2_investigation()
         
         # Phase 3: Cross-validation
         if max_depth >= 3:
-            print(f"\n📍 PHASE 3: CROSS-VALIDATION")
-            print("-" * 70)
+            logger.info("\n📍 PHASE 3: CROSS-VALIDATION\n%s", "-" * 70)
             self._phase_3_validation()
         
         # Phase 4: Synthesis
-        print(f"\n📍 PHASE 4: SYNTHESIS")
-        print("-" * 70)
+        logger.info("\n📍 PHASE 4: SYNTHESIS\n%s", "-" * 70)
         report = self._phase_4_synthesis()
         
         return {
@@ -587,25 +948,38 @@ Use the available tools to accomplish this."""
         """Phase 2: Deep dive on key angles"""
         
         if not self.state.key_angles:
-            print("  ⚠️  No angles identified, skipping deep investigation")
+            logger.warning("  ⚠️  No angles identified, skipping deep investigation")
             return
         
-        # Investigate each angle (limit to 2 to stay within limits)
-        for angle in self.state.key_angles[:2]:
-            print(f"\n  🔍 Investigating angle: {angle}")
-            
-            self._reset_chain()
-            
-            prompt = f"""Continue researching "{self.state.topic}".
+        # Investigate each angle (limit to 2 to stay within limits) - the
+        # chains are network-bound, so run them side by side
+        angles = self.state.key_angles[:2]
+        
+        # Seed the shared sources with one search per angle, all in flight at once
+        self.executor.prefetch_searches([f"{self.state.topic} {angle}" for angle in angles])
+        
+        with ThreadPoolExecutor(max_workers=len(angles)) as pool:
+            list(pool.map(self._investigate_angle, angles))
+        
+        self.state.complete_phase()
+    
+    def _investigate_angle(self, angle: str):
+        """Research one angle on its own chain (safe to run in a worker thread)"""
+        logger.info("\n  🔍 Investigating angle: %s", angle)
+        
+        # Own conversation, depth and executor; brave client and state are shared
+        worker = copy.copy(self)
+        worker.executor = ResearchToolExecutor(self.brave, self.state)
+        worker._reset_chain()
+        
+        prompt = f"""Continue researching "{self.state.topic}".
 
 Previous context: We've identified "{angle}" as a key angle to investigate.
 
 Task: Perform targeted searches on this angle and extract detailed findings.
 Use cross_reference to verify important facts."""
-            
-            self._execute_research_chain(prompt, max_steps=5)
         
-        self.state.complete_phase()
+        worker._execute_research_chain(prompt, max_steps=5)
     
     def _phase_3_validation(self):
         """Phase 3: Cross-validate findings"""
@@ -619,13 +993,13 @@ Use cross_reference to verify important facts."""
                 top_facts.extend(finding['facts'][:2])
         
         if not top_facts:
-            print("  ⚠️  No facts to validate")
+            logger.warning("  ⚠️  No facts to validate")
             return
         
         prompt = f"""Validate key findings for research on "{self.state.topic}".
 
 Previous research has identified these facts:
-{json.dumps(top_facts[:3], indent=2)}
+{_dumps_pretty(top_facts[:3])}
 
 Task: Use cross_reference to verify these facts appear in multiple sources.
 If verification fails, perform additional searches to find better sources."""
@@ -650,7 +1024,7 @@ If verification fails, perform additional searches to find better sources."""
         prompt = f"""Synthesize a final research report on "{self.state.topic}".
 
 Research Summary:
-{json.dumps(context, indent=2)}
+{_dumps_pretty(context)}
 
 Available sources: {len(self.state.sources)} web sources
 
@@ -662,10 +1036,10 @@ Task: Create a comprehensive summary that:
 
 Format as a clear, informative report."""
         
-        self.conversation.append({"role": "user", "content": prompt})
+        self._add_message("user", prompt)
         
         # Get synthesis without tools
-        response = call_llm(self.conversation, temperature=0.3)
+        response = call_llm(self.conversation, temperature=0.3, messages_json=self._conv_json)
         
         self.state.complete_phase()
         
@@ -673,49 +1047,90 @@ Format as a clear, informative report."""
     
     def _execute_research_chain(self, prompt: str, max_steps: int = 5):
         """Execute a research chain with tool calls"""
+        _run_sync(self._execute_research_chain_async(prompt, max_steps))
+    
+    async def _execute_research_chain_async(self, prompt: str, max_steps: int = 5):
+        """Research chain on one async client shared by all its HTTP calls"""
         
-        self.conversation.append({"role": "user", "content": prompt})
+        self._add_message("user", prompt)
         
-        for step in range(max_steps):
-            self.chain_depth += 1
-            
-            if self.chain_depth > MAX_CHAIN_DEPTH:
-                print(f"  ⚠️  Chain depth limit reached ({MAX_CHAIN_DEPTH})")
-                break
-            
-            print(f"\n  Step {step + 1}/{max_steps} (chain depth: {self.chain_depth})")
-            
-            # Get LLM response
-            response = call_llm(self.conversation, RESEARCH_TOOLS)
-            
-            # Check for tool calls
-            tool_calls = extract_tool_calls(response)
-            
-            if not tool_calls:
-                # No more tools needed
-                print(f"  ✓ Phase complete (no more tool calls)")
-                self.conversation.append({"role": "assistant", "content": response})
-                break
-            
-            # Execute tools
-            self.conversation.append({"role": "assistant", "content": response})
-            
-            for tool_call in tool_calls:
-                result = self.executor.execute(tool_call)
-                self.conversation.append({"role": "tool", "content": result})
+        client = new_async_client()
+        try:
+            for step in range(max_steps):
+                self.chain_depth += 1
+                
+                if self.chain_depth > MAX_CHAIN_DEPTH:
+                    logger.warning("  ⚠️  Chain depth limit reached (%d)", MAX_CHAIN_DEPTH)
+                    break
+                
+                logger.info("\n  Step %d/%d (chain depth: %d)", step + 1, max_steps, self.chain_depth)
+                
+                # Get LLM response
+                response = await call_llm_async(self.conversation, RESEARCH_TOOLS, client=client,
+                                                messages_json=self._conv_json)
+                
+                # Check for tool calls
+                tool_calls = extract_tool_calls(response)
                 
-                # Store findings
-                try:
-                    result_data = json.loads(result)
-                    self.state.add_finding(result_data)
-                except:
-                    pass
+                if not tool_calls:
+                    # No more tools needed
+                    logger.info("  ✓ Phase complete (no more tool calls)")
+                    self._add_message("assistant", response)
+                    break
+                
+                # Execute tools
+                self._add_message("assistant", response)
+                
+                results = await self._execute_tools_async(tool_calls, client)
+                
+                # One timestamp per step - all findings of a step share it
+                step_timestamp = datetime.now().isoformat()
+                for result in results:
+                    self._add_message("tool", result)
+                    
+                    # Store findings
+                    try:
+                        result_data = _loads(result)
+                        self.state.add_finding(result_data, step_timestamp)
+                    except:
+                        pass
+        finally:
+            if client is not None:
+                await client.aclose()
+    
+    async def _execute_tools_async(self, tool_calls: List[str],
+                                   client: Optional["httpx.AsyncClient"]) -> List[str]:
+        """
+        Run one step's tool calls in order. Consecutive searches are fanned
+        out together; a local tool first waits for the searches before it,
+        since it reads the sources they add.
+        """
+        results = []
+        pending = []
+        for tool_call in tool_calls:
+            if tool_call.startswith("brave_search("):
+                pending.append(self.executor.execute_async(tool_call, client))
+                continue
+            if pending:
+                results.extend(await asyncio.gather(*pending))
+                pending = []
+            results.append(self.executor.execute(tool_call))
+        if pending:
+            results.extend(await asyncio.gather(*pending))
+        return results
+    
+    def _add_message(self, role: str, content: str):
+        """Append to the conversation, encoding the message once"""
+        message = {"role": role, "content": content}
+        self.conversation.append(message)
+        self._conv_json.append(encode_message(message))
     
     def _reset_chain(self):
         """Reset conversation chain"""
         self.conversation = []
+        self._conv_json = []
         self.chain_depth = 0
-        print(f"  🔄 Chain reset")
+        logger.info("  🔄 Chain reset")
 
 
 # ============================================================
@@ -724,6 +1139,8 @@ Format as a clear, informative report."""
 def main():
     """Interactive research interface"""
     
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     print("\n" + "="*70)
     print("DEEP RESEARCHER - Brave Search API")
     print("="*70)
@@ -787,8 +1204,7 @@ def main():
             
             # Save to file
             filename = f"research_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            with open(filename, 'w') as f:
-                json.dump(result, f, indent=2)
+            _dump_file(result, filename)
             print(f"\n✓ Full results saved to: {filename}")
             
         except KeyboardInterrupt:
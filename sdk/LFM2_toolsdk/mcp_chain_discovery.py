@@ -4,9 +4,32 @@ Discovers actual chain depth limits with real tool calls
 """
 import subprocess
 import json
+import hashlib
 import requests
+from requests.adapters import HTTPAdapter
 import re
 import time
+import logging
+from collections import OrderedDict
+
+try:
+    import orjson
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+    def _dumps_bytes(obj) -> bytes:
+        return orjson.dumps(obj)
+
+    _loads = orjson.loads
+except ImportError:  # orjson is optional - fall back to stdlib json
+    def _dumps(obj) -> str:
+        return json.dumps(obj)
+
+    def _dumps_bytes(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+    _loads = json.loads
 
 
 # this is broken
@@ -17,50 +40,99 @@ LLM_URL = "http://localhost:8080/v1"
 # MODEL = "LFM2-8B-A1B-UD-Q3_K_XL-cuda"
 MODEL = "LFM2-8B-A1B-UD-Q3_K_XL-cpu"
 MCP_CMD = ["npx", "-y", "@modelcontextprotocol/server-filesystem", "/tmp"]
+LLM_CACHE_SIZE = 512  # Most recently used LLM responses kept for replayed prompts (0 disables)
+
+# Progress goes through logging - raise the level to mute it, DEBUG for per-iteration detail
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger("mcp_chain_discovery")
+
+# Shared HTTP session - reuses keep-alive connections across test iterations
+_SESSION = requests.Session()
+_SESSION.headers.update({"Connection": "keep-alive"})
+_SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0))
+
+# Tool-call patterns, compiled once for the test loops
+_CALL_RE = re.compile(r'\w+\([^)]*\)')
+_ARG_RE = re.compile(r'(\w+)=(["\'])([^"\']*)\2')
 
-# Start MCP
-proc = subprocess.Popen(MCP_CMD, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, bufsize=1)
+# Responses keyed by a digest of the request body - replayed prompts skip the LLM
+_LLM_CACHE: "OrderedDict[bytes, dict]" = OrderedDict()
+
+# Start MCP - binary pipes with a 64 KiB buffer - only whole JSON lines are decoded, by _loads
+proc = subprocess.Popen(MCP_CMD, stdin=subprocess.PIPE, stdout=subprocess.PIPE, bufsize=1 << 16)
 
 # Initialize
-proc.stdin.write(json.dumps({"jsonrpc":"2.0","id":1,"method":"initialize","params":{"protocolVersion":"2024-11-05","capabilities":{},"clientInfo":{"name":"test","version":"1.0"}}})+"\n")
+proc.stdin.write(_dumps_bytes({"jsonrpc":"2.0","id":1,"method":"initialize","params":{"protocolVersion":"2024-11-05","capabilities":{},"clientInfo":{"name":"test","version":"1.0"}}})+b"\n")
 proc.stdin.flush()
 proc.stdout.readline()
 
 # Get tools
-proc.stdin.write(json.dumps({"jsonrpc":"2.0","id":2,"method":"tools/list","params":{}})+"\n")
+proc.stdin.write(_dumps_bytes({"jsonrpc":"2.0","id":2,"method":"tools/list","params":{}})+b"\n")
 proc.stdin.flush()
-tools_response = json.loads(proc.stdout.readline())
+tools_response = _loads(proc.stdout.readline())
 mcp_tools = tools_response["result"]["tools"]
 openai_tools = [{"type":"function","function":{"name":t["name"],"description":t.get("description",""),"parameters":t.get("inputSchema",{})}} for t in mcp_tools]
 
-print("MCP Filesystem Server Connected")
-print("="*60)
+# Fixed request fields (tools schema included) encoded once; only messages vary
+_BODY_HEAD = _dumps_bytes({"model": MODEL, "tools": openai_tools, "temperature": 0, "max_tokens": 512})[:-1] + b',"messages":'
+
+logger.info("MCP Filesystem Server Connected\n%s", "=" * 60)
 
 def execute_tool_via_mcp(name, args, req_id):
     """Execute single tool via MCP"""
-    proc.stdin.write(json.dumps({"jsonrpc":"2.0","id":req_id,"method":"tools/call","params":{"name":name,"arguments":args}})+"\n")
+    proc.stdin.write(_dumps_bytes({"jsonrpc":"2.0","id":req_id,"method":"tools/call","params":{"name":name,"arguments":args}})+b"\n")
     proc.stdin.flush()
-    result = json.loads(proc.stdout.readline())["result"]
+    result = _loads(proc.stdout.readline())["result"]
     return result
 
+def execute_tools_via_mcp(calls, first_id):
+    """Pipeline several (name, args) tool calls - one flush, then read every reply"""
+    ids = range(first_id, first_id + len(calls))
+    proc.stdin.write(b"".join(
+        _dumps_bytes({"jsonrpc":"2.0","id":req_id,"method":"tools/call","params":{"name":name,"arguments":args}}) + b"\n"
+        for req_id, (name, args) in zip(ids, calls)
+    ))
+    proc.stdin.flush()
+    replies = {}
+    while len(replies) < len(calls):
+        msg = _loads(proc.stdout.readline())
+        if msg.get("id") in ids:
+            replies[msg["id"]] = msg["result"]
+    return [replies[req_id] for req_id in ids]
+
+def chat_completion(conv):
+    """POST the conversation, serving identical requests from _LLM_CACHE"""
+    body = _BODY_HEAD + _dumps_bytes(conv) + b"}"
+    key = hashlib.blake2b(body, digest_size=16).digest()
+    if key in _LLM_CACHE:
+        _LLM_CACHE.move_to_end(key)
+        return _LLM_CACHE[key]
+    resp = _SESSION.post(
+        f"{LLM_URL}/chat/completions",
+        data=body,
+        headers={"Content-Type": "application/json"}
+    ).json()
+    if "choices" in resp and LLM_CACHE_SIZE > 0:  # never cache server errors
+        _LLM_CACHE[key] = resp
+        if len(_LLM_CACHE) > LLM_CACHE_SIZE:
+            _LLM_CACHE.popitem(last=False)
+    return resp
+
 def test_chain_depth(max_depth=15):
     """Test progressively deeper chains"""
     
-    print("\nTEST: CHAIN DEPTH DISCOVERY")
-    print("="*60)
+    logger.info("\nTEST: CHAIN DEPTH DISCOVERY\n%s", "=" * 60)
     
     results = []
     
     for depth in range(1, max_depth + 1):
-        print(f"\n--- Testing Chain Depth: {depth} ---")
+        logger.info("\n--- Testing Chain Depth: %d ---", depth)
         
         # Create test files for this depth
-        for i in range(depth):
-            execute_tool_via_mcp(
-                "write_file",
-                {"path": f"/tmp/depth_test_{i}.txt", "content": f"File {i} data"},
-                1000 + i
-            )
+        execute_tools_via_mcp(
+            [("write_file", {"path": f"/tmp/depth_test_{i}.txt", "content": f"File {i} data"}) for i in range(depth)],
+            1000
+        )
         
         # Build query that requires reading all files in sequence
         file_list = ", ".join([f"/tmp/depth_test_{i}.txt" for i in range(depth)])
@@ -74,40 +146,37 @@ def test_chain_depth(max_depth=15):
         
         try:
             for iteration in range(depth + 5):  # Allow some extra iterations
-                resp = requests.post(
-                    f"{LLM_URL}/chat/completions",
-                    json={"model": MODEL, "messages": conv, "tools": openai_tools, "temperature": 0, "max_tokens": 512}
-                ).json()
+                resp = chat_completion(conv)
                 
                 content = resp["choices"][0]["message"]["content"]
                 
                 if "<|tool_call_start|>" not in content:
                     # Got final answer
                     success = True
-                    print(f"  ✓ Final answer after {len(tools_called)} tool calls")
+                    logger.info("  ✓ Final answer after %d tool calls", len(tools_called))
                     break
                 
                 # Extract and execute tools
                 calls_str = content.split("<|tool_call_start|>")[1].split("<|tool_call_end|>")[0].strip("[]")
-                tool_calls = re.findall(r'\w+\([^)]*\)', calls_str)
+                tool_calls = _CALL_RE.findall(calls_str)
                 
                 conv.append({"role": "assistant", "content": content})
                 
                 for call in tool_calls:
                     name = call.split("(")[0]
                     args = {}
-                    for match in re.findall(r'(\w+)=(["\'])([^"\']*)\2', call):
+                    for match in _ARG_RE.findall(call):
                         args[match[0]] = match[2]
                     
                     result = execute_tool_via_mcp(name, args, 2000 + len(tools_called))
                     tools_called.append(name)
                     
-                    conv.append({"role": "tool", "content": json.dumps(result)})
+                    conv.append({"role": "tool", "content": _dumps(result)})
                 
-                print(f"  Iteration {iteration + 1}: {len(tool_calls)} calls, total: {len(tools_called)}")
+                logger.debug("  Iteration %d: %d calls, total: %d", iteration + 1, len(tool_calls), len(tools_called))
         
         except Exception as e:
-            print(f"  ✗ Failed: {str(e)}")
+            logger.error("  ✗ Failed: %s", e)
         
         # Record result
         result_data = {
@@ -119,10 +188,9 @@ def test_chain_depth(max_depth=15):
         results.append(result_data)
         
         if success:
-            print(f"  ✓ SUCCESS - Called {len(tools_called)} tools for depth {depth}")
+            logger.info("  ✓ SUCCESS - Called %d tools for depth %d", len(tools_called), depth)
         else:
-            print(f"  ✗ FAILED - Chain broke at depth {depth}")
-            print(f"  Max reliable depth: {depth - 1}")
+            logger.info("  ✗ FAILED - Chain broke at depth %d\n  Max reliable depth: %d", depth, depth - 1)
             break
         
         time.sleep(0.5)  # Rate limit
@@ -132,49 +200,41 @@ def test_chain_depth(max_depth=15):
 def test_history_retention():
     """Test how far back model can recall results"""
     
-    print("\n\nTEST: HISTORY RETENTION")
-    print("="*60)
+    logger.info("\n\nTEST: HISTORY RETENTION\n%s", "=" * 60)
     
     # Create sequence of files with unique data
-    file_data = {}
-    for i in range(8):
-        data = f"UNIQUE_DATA_{i}_{'X' * (i * 3)}"
-        execute_tool_via_mcp(
-            "write_file",
-            {"path": f"/tmp/history_test_{i}.txt", "content": data},
-            3000 + i
-        )
-        file_data[i] = data
+    file_data = {i: f"UNIQUE_DATA_{i}_{'X' * (i * 3)}" for i in range(8)}
+    execute_tools_via_mcp(
+        [("write_file", {"path": f"/tmp/history_test_{i}.txt", "content": data}) for i, data in file_data.items()],
+        3000
+    )
     
     # Read all files
     conv = [{"role": "user", "content": "Read files /tmp/history_test_0.txt through /tmp/history_test_7.txt"}]
     
-    print("\nReading 8 files...")
+    logger.info("\nReading 8 files...")
     for iteration in range(20):
-        resp = requests.post(
-            f"{LLM_URL}/chat/completions",
-            json={"model": MODEL, "messages": conv, "tools": openai_tools, "temperature": 0, "max_tokens": 512}
-        ).json()
+        resp = chat_completion(conv)
         
         content = resp["choices"][0]["message"]["content"]
         
         if "<|tool_call_start|>" not in content:
-            print(f"✓ All files read in {iteration + 1} iterations\n")
+            logger.info("✓ All files read in %d iterations\n", iteration + 1)
             break
         
         calls_str = content.split("<|tool_call_start|>")[1].split("<|tool_call_end|>")[0].strip("[]")
-        tool_calls = re.findall(r'\w+\([^)]*\)', calls_str)
+        tool_calls = _CALL_RE.findall(calls_str)
         
         conv.append({"role": "assistant", "content": content})
         
         for call in tool_calls:
             name = call.split("(")[0]
             args = {}
-            for match in re.findall(r'(\w+)=(["\'])([^"\']*)\2', call):
+            for match in _ARG_RE.findall(call):
                 args[match[0]] = match[2]
             
             result = execute_tool_via_mcp(name, args, 4000 + iteration)
-            conv.append({"role": "tool", "content": json.dumps(result)})
+            conv.append({"role": "tool", "content": _dumps(result)})
     
     # Now test recall
     retention_results = []
@@ -185,10 +245,7 @@ def test_history_retention():
         
         conv.append({"role": "user", "content": query})
         
-        resp = requests.post(
-            f"{LLM_URL}/chat/completions",
-            json={"model": MODEL, "messages": conv, "tools": openai_tools, "temperature": 0, "max_tokens": 512}
-        ).json()
+        resp = chat_completion(conv)
         
         content = resp["choices"][0]["message"]["content"]
         conv.append({"role": "assistant", "content": content})
@@ -196,9 +253,8 @@ def test_history_retention():
         # Check if correct data mentioned
         recalled = expected_data in content
         
-        print(f"Recall file {test_idx}: {'✓' if recalled else '✗'}")
-        print(f"  Expected: {expected_data}")
-        print(f"  Got: {content[:80]}...")
+        logger.info("Recall file %d: %s\n  Expected: %s\n  Got: %s...",
+                    test_idx, '✓' if recalled else '✗', expected_data, content[:80])
         
         retention_results.append({
             "file_index": test_idx,
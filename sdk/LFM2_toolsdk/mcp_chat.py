@@ -3,72 +3,49 @@ INTERACTIVE MCP CHAT
 Real-time chat interface with MCP filesystem tools
 Based on working minimal example
 """
-import subprocess
-import json
-import requests
-import re
 import sys
-from datetime import datetime
+import asyncio
 from typing import List, Dict, Set
 
+from _mcp_chat import MCPChatCore
+from _tool_loop import _DUPLICATE_NOTE, _dumps, run_tool_loop
+
 # Config
 LLM_URL = "http://localhost:8080/v1"
 MODEL = "LFM2-8B-A1B-UD-Q3_K_XL-cpu"  # Change to your model
+TEMPERATURE = 0.7  # Sampling temperature; set 0 for repeatable replies worth caching
 MCP_CMD = ["npx", "-y", "@modelcontextprotocol/server-filesystem", "/tmp"]
+MCP_LINE_LIMIT = 1 << 24  # Largest MCP reply line in bytes (asyncio defaults to 64 KiB)
+RESPONSE_CACHE_SIZE = 256  # LLM replies kept for repeated (conversation, tools) requests when caching
+MAX_CTX_CHARS = 16_000  # Conversation size that triggers compaction of old tool results
+KEEP_RECENT_MESSAGES = 6  # Latest messages always sent verbatim
+TOOL_SUMMARY_CHARS = 200  # Leading characters kept from a compacted tool result
+MAX_ITERATIONS = 10  # Most LLM calls per user message
+MAX_SECONDS = 60  # Wall-clock budget per user message; no new LLM call starts after it
+BATCH_WINDOW_MS = 100  # How long BatchedMCPChat gathers prompts before sending them
+MAX_BATCH = 16  # Most prompts dispatched together (keep <= server parallel slots)
 
-class MCPChat:
+class MCPChat(MCPChatCore):
     """Interactive chat with MCP tools"""
     
-    def __init__(self):
+    __slots__ = ()
+    
+    def __init__(self, use_cache: bool = False, max_iterations: int = MAX_ITERATIONS,
+                 max_seconds: float = MAX_SECONDS):
         print("Starting MCP Filesystem Server...")
-        
-        # Start MCP server
-        self.proc = subprocess.Popen(
-            MCP_CMD, 
-            stdin=subprocess.PIPE, 
-            stdout=subprocess.PIPE, 
-            text=True, 
-            bufsize=1
+        super().__init__(
+            MCP_CMD, LLM_URL, MODEL,
+            temperature=TEMPERATURE,
+            use_cache=use_cache,
+            max_iterations=max_iterations,
+            max_seconds=max_seconds,
+            mcp_line_limit=MCP_LINE_LIMIT,
+            response_cache_size=RESPONSE_CACHE_SIZE,
+            max_ctx_chars=MAX_CTX_CHARS,
+            keep_recent_messages=KEEP_RECENT_MESSAGES,
+            tool_summary_chars=TOOL_SUMMARY_CHARS,
         )
         
-        # Initialize MCP
-        self.proc.stdin.write(json.dumps({
-            "jsonrpc": "2.0",
-            "id": 1,
-            "method": "initialize",
-            "params": {
-                "protocolVersion": "2024-11-05",
-                "capabilities": {},
-                "clientInfo": {"name": "interactive-chat", "version": "1.0"}
-            }
-        }) + "\n")
-        self.proc.stdin.flush()
-        self.proc.stdout.readline()
-        
-        # Get tools
-        self.proc.stdin.write(json.dumps({
-            "jsonrpc": "2.0",
-            "id": 2,
-            "method": "tools/list",
-            "params": {}
-        }) + "\n")
-        self.proc.stdin.flush()
-        tools_response = json.loads(self.proc.stdout.readline())
-        self.mcp_tools = tools_response["result"]["tools"]
-        
-        # Convert to OpenAI format
-        self.openai_tools = [
-            {
-                "type": "function",
-                "function": {
-                    "name": t["name"],
-                    "description": t.get("description", ""),
-                    "parameters": t.get("inputSchema", {})
-                }
-            }
-            for t in self.mcp_tools
-        ]
-        
         # Chat state
         self.conversation = [
             {
@@ -81,28 +58,23 @@ class MCPChat:
                 )
             }
         ]
-        self.tool_id = 100
-        self.called_tools: Set[str] = set()  # Anti-loop
         
         print(f"✓ MCP Server ready")
         print(f"✓ Available tools: {len(self.mcp_tools)}")
         print(f"  {', '.join([t['name'] for t in self.mcp_tools[:5]])}...")
     
-    def call_tool(self, name: str, args: Dict) -> Dict:
-        """Execute tool via MCP"""
-        self.tool_id += 1
-        self.proc.stdin.write(json.dumps({
-            "jsonrpc": "2.0",
-            "id": self.tool_id,
-            "method": "tools/call",
-            "params": {"name": name, "arguments": args}
-        }) + "\n")
-        self.proc.stdin.flush()
-        result = json.loads(self.proc.stdout.readline())["result"]
-        return result
-    
     def process_message(self, user_input: str, verbose: bool = False) -> str:
         """Process user message and return response"""
+        return self._loop.run_until_complete(self.process_message_async(user_input, verbose))
+    
+    async def run_batch(self, prompts: List[str], verbose: bool = False) -> List[str]:
+        """Answer independent prompts concurrently, each in a fresh conversation"""
+        return await asyncio.gather(
+            *(self.fork().process_message_async(p, verbose) for p in prompts)
+        )
+    
+    async def process_message_async(self, user_input: str, verbose: bool = False) -> str:
+        """Process user message and return response"""
         
         # Add user message
         self.conversation.append({"role": "user", "content": user_input})
@@ -110,86 +82,48 @@ class MCPChat:
         # Reset anti-loop for new query
         self.called_tools.clear()
         
-        # Process with tools (max 10 iterations to prevent infinite loops)
-        for iteration in range(10):
+        async def tool(name: str, args: Dict) -> str:
+            return await self._run_tool(name, args, verbose)
+        
+        def show_iteration(iteration: int):
+            print(f"\n  [Iteration {iteration + 1}]")
+        
+        def show_calls(iteration: int, tool_calls: List[str]):
+            print(f"  Tool calls: {tool_calls}")
+        
+        def skip_duplicate(name: str, args: Dict) -> str:
+            print(f"  ⚠️  Skipping duplicate: {name}({args})")
+            return _DUPLICATE_NOTE
+        
+        # Process with tools until answered, out of iterations/time, or stuck repeating calls
+        try:
+            answer = await run_tool_loop(
+                self.conversation, self.call_llm, tool, self.called_tools,
+                on_iteration=show_iteration if verbose else None,
+                on_tool_calls=show_calls if verbose else None,
+                on_duplicate=skip_duplicate if verbose else None,
+                after_tools=self._compact_conversation,
+                max_iterations=self.max_iterations,
+                max_seconds=self.max_seconds,
+            )
+        except Exception as e:
+            return f"Error calling LLM: {e}"
+        if answer is None:
+            return "I apologize, I got stuck in a loop. Let me try rephrasing that..."
+        return answer
+    
+    async def _run_tool(self, name: str, args: Dict, verbose: bool) -> str:
+        """Execute one tool call and return the tool message content"""
+        try:
+            result_str = await self.call_tool_async(name, args, raw=True)
             if verbose:
-                print(f"\n  [Iteration {iteration + 1}]")
-            
-            # Call LLM
-            try:
-                response = requests.post(
-                    f"{LLM_URL}/chat/completions",
-                    json={
-                        "model": MODEL,
-                        "messages": self.conversation,
-                        "tools": self.openai_tools,
-                        "temperature": 0.7,
-                        "max_tokens": 512
-                    },
-                    timeout=30
-                )
-                response.raise_for_status()
-                content = response.json()["choices"][0]["message"]["content"]
-            except Exception as e:
-                return f"Error calling LLM: {e}"
-            
-            # Check if model wants to call tools
-            if "<|tool_call_start|>" not in content:
-                # Final answer - add to conversation and return
-                self.conversation.append({"role": "assistant", "content": content})
-                return content
-            
-            # Extract tool calls
-            calls_str = content.split("<|tool_call_start|>")[1].split("<|tool_call_end|>")[0].strip("[]")
-            tool_calls = re.findall(r'\w+\([^)]*\)', calls_str)
-            
+                print(f"  → {name}({args})")
+                print(f"  ← {result_str[:100]}...")
+            return result_str
+        except Exception as e:
             if verbose:
-                print(f"  Tool calls: {tool_calls}")
-            
-            self.conversation.append({"role": "assistant", "content": content})
-            
-            # Execute tools
-            for call in tool_calls:
-                # Parse tool call
-                name = call.split("(")[0]
-                args = {}
-                for match in re.findall(r'(\w+)=(["\'])([^"\']*)\2', call):
-                    args[match[0]] = match[2]
-                
-                # Anti-loop: skip if already called
-                call_signature = f"{name}({json.dumps(args, sort_keys=True)})"
-                if call_signature in self.called_tools:
-                    if verbose:
-                        print(f"  ⚠️  Skipping duplicate: {call}")
-                    self.conversation.append({
-                        "role": "tool",
-                        "content": json.dumps({"note": "Already called this tool"})
-                    })
-                    continue
-                
-                self.called_tools.add(call_signature)
-                
-                # Execute tool
-                try:
-                    result = self.call_tool(name, args)
-                    if verbose:
-                        result_str = json.dumps(result)
-                        print(f"  → {name}({args})")
-                        print(f"  ← {result_str[:100]}...")
-                    self.conversation.append({
-                        "role": "tool",
-                        "content": json.dumps(result)
-                    })
-                except Exception as e:
-                    if verbose:
-                        print(f"  ✗ Tool error: {e}")
-                    self.conversation.append({
-                        "role": "tool",
-                        "content": json.dumps({"error": str(e)})
-                    })
-        
-        # Max iterations reached
-        return "I apologize, I got stuck in a loop. Let me try rephrasing that..."
+                print(f"  ✗ Tool error: {e}")
+            return _dumps({"error": str(e)})
     
     def run(self):
         """Main interactive loop"""
@@ -256,24 +190,90 @@ class MCPChat:
         
         finally:
             self.cleanup()
+
+
+class BatchedMCPChat(MCPChat):
+    """
+    MCPChat that collects prompts arriving within a short window and sends
+    them to the LLM together, so a batching server runs them in one pass
+    """
+    
+    __slots__ = ("batch_window_ms", "max_batch", "_queue", "_worker", "_dispatches")
+    
+    def __init__(self, batch_window_ms: float = BATCH_WINDOW_MS, max_batch: int = MAX_BATCH,
+                 **chat_options):
+        super().__init__(**chat_options)
+        self.batch_window_ms = batch_window_ms
+        self.max_batch = max_batch
+        self._queue = asyncio.Queue()
+        self._worker = None
+        self._dispatches: Set[asyncio.Task] = set()  # Running batches - the loop only keeps weak references
+    
+    def batch_prompt(self, prompts: List[str]) -> List[str]:
+        """Answer independent prompts, each in a fresh conversation"""
+        return self._loop.run_until_complete(self.submit_all(prompts))
+    
+    async def submit_all(self, prompts: List[str]) -> List[str]:
+        """Queue several prompts at once and wait for all their answers"""
+        return await asyncio.gather(*(self.submit(p) for p in prompts))
+    
+    async def submit(self, prompt: str) -> str:
+        """Queue a prompt for the next batch and wait for its answer"""
+        if self._worker is None:
+            self._worker = self._loop.create_task(self._collect())
+        future = self._loop.create_future()
+        await self._queue.put((prompt, future))
+        return await future
+    
+    async def _collect(self):
+        """Drain the queue one window (or max_batch prompts) at a time"""
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.batch_window_ms / 1000
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(await asyncio.wait_for(
+                        self._queue.get(), max(deadline - self._loop.time(), 0)
+                    ))
+                except asyncio.TimeoutError:
+                    break
+            # Run the batch without holding up the next window
+            task = self._loop.create_task(self._dispatch(batch))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+    
+    async def _dispatch(self, batch: List):
+        """Run one batch of prompts concurrently and resolve their futures"""
+        answers = await asyncio.gather(
+            *(self.fork().process_message_async(prompt) for prompt, _ in batch),
+            return_exceptions=True
+        )
+        for (_, future), answer in zip(batch, answers):
+            if future.done():  # The caller stopped waiting (cancelled or timed out)
+                continue
+            if isinstance(answer, BaseException):
+                future.set_exception(answer)
+            else:
+                future.set_result(answer)
     
     def cleanup(self):
-        """Clean up resources"""
-        try:
-            self.proc.terminate()
-            self.proc.wait(timeout=2)
-        except:
-            self.proc.kill()
-        print("\n✓ MCP Server stopped")
+        """Stop the batch collector, then clean up as MCPChat does"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                self._loop.run_until_complete(self._worker)
+            except asyncio.CancelledError:
+                pass
+        super().cleanup()
 
 
 # ============================================================
 # EXAMPLE USAGE
 # ============================================================
 
-def example_conversation():
+def example_conversation(use_cache: bool = False):
     """Show example conversation flow"""
-    chat = MCPChat()
+    chat = MCPChat(use_cache)
     
     print("\n" + "="*60)
     print("EXAMPLE CONVERSATION")
@@ -300,10 +300,27 @@ def example_conversation():
 # ============================================================
 
 if __name__ == "__main__":
-    if len(sys.argv) > 1 and sys.argv[1] == "example":
+    args = sys.argv[1:]
+    batch_window_ms = BATCH_WINDOW_MS
+    if "--batch-window-ms" in args:
+        i = args.index("--batch-window-ms")
+        batch_window_ms = float(args[i + 1])
+        del args[i:i + 2]
+    use_cache = "--cache" in args  # Opt-in: only repeatable at TEMPERATURE 0
+    if use_cache:
+        args.remove("--cache")
+    
+    if args and args[0] == "example":
         # Run example conversation
-        example_conversation()
+        example_conversation(use_cache)
+    elif args and args[0] == "batch":
+        # Answer each remaining argument as an independent, micro-batched prompt
+        chat = BatchedMCPChat(batch_window_ms=batch_window_ms, use_cache=use_cache)
+        for prompt, response in zip(args[1:], chat.batch_prompt(args[1:])):
+            print(f"\n\033[1;34mYou:\033[0m {prompt}")
+            print(f"\033[1;32mAssistant:\033[0m {response}")
+        chat.cleanup()
     else:
         # Run interactive chat
-        chat = MCPChat()
+        chat = MCPChat(use_cache)
         chat.run()
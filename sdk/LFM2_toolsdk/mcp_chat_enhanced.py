@@ -2,69 +2,66 @@
 INTERACTIVE MCP CHAT - Enhanced Tool Transparency
 Shows Every Step: Tool Call → Raw Result → LLM Interpretation
 """
-import subprocess
 import json
-import requests
-import re
 import sys
-from datetime import datetime
-from typing import List, Dict, Set
+import asyncio
+import logging
+from typing import List, Dict
+
+from _mcp_chat import MCPChatCore
+from _tool_loop import _DUPLICATE_RESULT, _dumps, run_tool_loop
 
 # Config
 LLM_URL = "http://localhost:8080/v1"
 # MODEL = "LFM2-8B-A1B-UD-Q3_K_XL-cpu"  # Change to your model
 
 MODEL = "LFM2-8B-A1B-BF16-cuda"
+TEMPERATURE = 0.7  # Sampling temperature; set 0 for repeatable replies worth caching
 MCP_CMD = ["npx", "-y", "@modelcontextprotocol/server-filesystem", "/tmp"]
+MCP_LINE_LIMIT = 1 << 24  # Largest MCP reply line in bytes (asyncio defaults to 64 KiB)
+RESPONSE_CACHE_SIZE = 256  # LLM replies kept for repeated (conversation, tools) requests when caching
+MAX_CTX_CHARS = 16_000  # Conversation size that triggers compaction of old tool results
+KEEP_RECENT_MESSAGES = 6  # Latest messages always sent verbatim
+TOOL_SUMMARY_CHARS = 200  # Leading characters kept from a compacted tool result
+MAX_ITERATIONS = 10  # Most LLM calls per user message
+MAX_SECONDS = 60  # Wall-clock budget per user message; no new LLM call starts after it
+
+# Debug output goes through logging so it is only formatted when emitted
+logger = logging.getLogger("mcp_chat_enhanced")
+_TOOL_LOG = ("\033[1;35m📡 TOOL:\033[0m %s\n   Arguments: %s\n"
+             "\033[1;35m📥 RAW TOOL RESULT:\033[0m\n   %s")
+
+class _lazy_json:
+    """Pretty-prints a tool result only when a log record is formatted"""
+    __slots__ = ("obj",)
+    
+    def __init__(self, obj):
+        self.obj = obj
+    
+    def __str__(self) -> str:
+        return json.dumps(self.obj, indent=4)
 
-class MCPChat:
+class MCPChat(MCPChatCore):
     """Interactive chat with MCP tools - Now with full transparency!"""
     
-    def __init__(self):
+    __slots__ = ("debug_mode",)
+    
+    def __init__(self, use_cache: bool = False, max_iterations: int = MAX_ITERATIONS,
+                 max_seconds: float = MAX_SECONDS):
         print("Starting MCP Filesystem Server...")
-        
-        # Start MCP server
-        self.proc = subprocess.Popen(
-            MCP_CMD, 
-            stdin=subprocess.PIPE, 
-            stdout=subprocess.PIPE, 
-            text=True, 
-            bufsize=1
+        super().__init__(
+            MCP_CMD, LLM_URL, MODEL,
+            temperature=TEMPERATURE,
+            use_cache=use_cache,
+            max_iterations=max_iterations,
+            max_seconds=max_seconds,
+            mcp_line_limit=MCP_LINE_LIMIT,
+            response_cache_size=RESPONSE_CACHE_SIZE,
+            max_ctx_chars=MAX_CTX_CHARS,
+            keep_recent_messages=KEEP_RECENT_MESSAGES,
+            tool_summary_chars=TOOL_SUMMARY_CHARS,
         )
         
-        # Initialize MCP
-        self.proc.stdin.write(json.dumps({
-            "jsonrpc": "2.0", "id": 1, "method": "initialize",
-            "params": {
-                "protocolVersion": "2024-11-05",
-                "capabilities": {}, 
-                "clientInfo": {"name": "interactive-chat", "version": "1.0"}
-            }
-        }) + "\n")
-        self.proc.stdin.flush()
-        self.proc.stdout.readline()
-        
-        # Get tools
-        self.proc.stdin.write(json.dumps({
-            "jsonrpc": "2.0", "id": 2, "method": "tools/list", "params": {}
-        }) + "\n")
-        self.proc.stdin.flush()
-        tools_response = json.loads(self.proc.stdout.readline())
-        self.mcp_tools = tools_response["result"]["tools"]
-        
-        # Convert to OpenAI format
-        self.openai_tools = [
-            {
-                "type": "function",
-                "function": {
-                    "name": t["name"],
-                    "description": t.get("description", ""),
-                    "parameters": t.get("inputSchema", {})
-                }
-            }
-            for t in self.mcp_tools
-        ]
-        
         # In MCPChat.__init__ after getting tools
         tools_list = ", ".join([f"{t['name']}" for t in self.mcp_tools])
         tools_examples = "\n".join([
@@ -87,28 +84,22 @@ class MCPChat:
                 "You: 'I found X files...'"
             )
         }]
-        self.tool_id = 100
-        self.called_tools: Set[str] = set()
         self.debug_mode = False
         
         print(f"✓ MCP Server ready")
         print(f"✓ {len(self.mcp_tools)} tools available")
         print(f"  {', '.join([t['name'] for t in self.mcp_tools])}")
     
-    def call_tool(self, name: str, args: Dict) -> Dict:
-        """Execute tool via MCP"""
-        self.tool_id += 1
-        self.proc.stdin.write(json.dumps({
-            "jsonrpc": "2.0", "id": self.tool_id,
-            "method": "tools/call",
-            "params": {"name": name, "arguments": args}
-        }) + "\n")
-        self.proc.stdin.flush()
-        result = json.loads(self.proc.stdout.readline())["result"]
-        return result
-    
     def process_message(self, user_input: str) -> str:
         """Process user message with full transparency mode"""
+        return self._loop.run_until_complete(self.process_message_async(user_input))
+    
+    async def run_batch(self, prompts: List[str]) -> List[str]:
+        """Answer independent prompts concurrently, each in a fresh conversation"""
+        return await asyncio.gather(*(self.fork().process_message_async(p) for p in prompts))
+    
+    async def process_message_async(self, user_input: str) -> str:
+        """Process user message with full transparency mode"""
         
         # Add user message
         self.conversation.append({"role": "user", "content": user_input})
@@ -118,92 +109,59 @@ class MCPChat:
         print(f"\033[1;34m📝 USER REQUEST:\033[0m {user_input}")
         print("─" * 60)
         
-        # Process with tools (max 10 iterations)
-        for iteration in range(10):
-            if self.debug_mode:
-                print(f"\n\033[1;36m[Debug] Iteration {iteration + 1} - Calling LLM...\033[0m")
-            
-            # Call LLM
-            try:
-                response = requests.post(
-                    f"{LLM_URL}/chat/completions",
-                    json={
-                        "model": MODEL,
-                        "messages": self.conversation,
-                        "tools": self.openai_tools,
-                        "temperature": 0.7,
-                        "max_tokens": 512
-                    },
-                    timeout=30
-                )
-                response.raise_for_status()
-                content = response.json()["choices"][0]["message"]["content"]
-            except Exception as e:
-                return f"❌ Error calling LLM: {e}"
-            
-            # Check if model wants to call tools
-            if "<|tool_call_start|>" not in content:
-                # FINAL ANSWER - No more tool calls
-                print(f"\n\033[1;32m✓ FINAL RESPONSE:\033[0m")
-                print("─" * 60)
-                print(content)
-                print("─" * 60)
-                self.conversation.append({"role": "assistant", "content": content})
-                return content
-            
+        def show_iteration(iteration: int):
+            logger.debug("\n\033[1;36m[Debug] Iteration %d - Calling LLM...\033[0m", iteration + 1)
+        
+        def show_calls(iteration: int, tool_calls: List[str]):
             # ─────────────────────────────────────────────────────────────
             # TOOL CALL DETECTED
             # ─────────────────────────────────────────────────────────────
             print(f"\n\033[1;33m🔧 TOOL CALL DETECTED [Iteration {iteration + 1}]\033[0m")
-            
-            # Parse tool calls
-            calls_str = content.split("<|tool_call_start|>")[1].split(" <|tool_call_end|> ")[0].strip("[]")
-            tool_calls = re.findall(r'\w+\([^)]*\)', calls_str)
-            
             print("\033[1;33mLLM wants to call:\033[0m")
             for call in tool_calls:
                 print(f"  → {call}")
-            
-            # Add assistant's tool call request to conversation
-            self.conversation.append({"role": "assistant", "content": content})
-            
-            # Execute each tool call
-            for call in tool_calls:
-                # Parse tool name and arguments
-                name = call.split("(")[0]
-                args = {}
-                for match in re.findall(r'(\w+)=(["\'])([^"\']*)\2', call):
-                    args[match[0]] = match[2]
-                
-                # Anti-loop check
-                call_signature = f"{name}({json.dumps(args, sort_keys=True)})"
-                if call_signature in self.called_tools:
-                    print(f"\n⚠️  \033[1;31mANTI-LOOP:\033[0m Skipping duplicate call")
-                    tool_result = {"note": "Already called this tool"}
-                else:
-                    self.called_tools.add(call_signature)
-                    
-                    # Execute tool
-                    print(f"\n\033[1;35m📡 EXECUTING TOOL:\033[0m {name}")
-                    print(f"   Arguments: {args}")
-                    try:
-                        tool_result = self.call_tool(name, args)
-                    except Exception as e:
-                        tool_result = {"error": str(e)}
-                        print(f"   ❌ Error: {e}")
-                
-                # Show raw tool result
-                print(f"\033[1;35m📥 RAW TOOL RESULT:\033[0m")
-                print(f"   {json.dumps(tool_result, indent=4)}")
-                
-                # Add tool result to conversation (for LLM to interpret)
-                self.conversation.append({
-                    "role": "tool",
-                    "content": json.dumps(tool_result)
-                })
         
-        # Max iterations reached
-        return "❌ I apologize, I got stuck in a loop. Let me try rephrasing that..."
+        def skip_duplicate(name: str, args: Dict) -> str:
+            print(f"\n⚠️  \033[1;31mANTI-LOOP:\033[0m Skipping duplicate call to {name}")
+            return self._tool_content(name, args, _DUPLICATE_RESULT)
+        
+        # Process with tools until answered, out of iterations/time, or stuck repeating calls
+        try:
+            content = await run_tool_loop(
+                self.conversation, self.call_llm, self._run_tool, self.called_tools,
+                on_iteration=show_iteration if self.debug_mode else None,
+                on_tool_calls=show_calls,
+                on_duplicate=skip_duplicate,
+                after_tools=self._compact_conversation,
+                max_iterations=self.max_iterations,
+                max_seconds=self.max_seconds,
+            )
+        except Exception as e:
+            return f"❌ Error calling LLM: {e}"
+        if content is None:
+            return "❌ I apologize, I got stuck in a loop. Let me try rephrasing that..."
+        
+        # FINAL ANSWER - No more tool calls
+        print(f"\n\033[1;32m✓ FINAL RESPONSE:\033[0m")
+        print("─" * 60)
+        print(content)
+        print("─" * 60)
+        return content
+    
+    async def _run_tool(self, name: str, args: Dict) -> str:
+        """Execute one tool call and return the tool message content"""
+        try:
+            tool_result = await self.call_tool_async(name, args)
+        except Exception as e:
+            tool_result = {"error": str(e)}
+            print(f"   ❌ Error ({name}): {e}")
+        return self._tool_content(name, args, tool_result)
+    
+    def _tool_content(self, name: str, args: Dict, tool_result: Dict) -> str:
+        """Serialize a tool result for the conversation, logging it in debug mode"""
+        if self.debug_mode:
+            logger.debug(_TOOL_LOG, name, args, _lazy_json(tool_result))
+        return _dumps(tool_result)
     
     def run(self):
         """Main interactive loop"""
@@ -273,27 +231,19 @@ class MCPChat:
         finally:
             self.cleanup()
     
-    def cleanup(self):
-        """Clean up resources"""
-        try:
-            self.proc.terminate()
-            self.proc.wait(timeout=2)
-        except:
-            self.proc.kill()
-        print("\n✓ MCP Server stopped")
 
 # ============================================================
 # EXAMPLE USAGE
 # ============================================================
 
-def demonstrate_tool_flow():
+def demonstrate_tool_flow(use_cache: bool = False):
     """Show a complete example with all steps visible"""
     print("\n" + "═"*70)
     print("DEMONSTRATION: Complete Tool Call Flow")
     print("═"*70)
     print("This shows every step: User → LLM → Tool → Result → LLM → Answer")
     
-    chat = MCPChat()
+    chat = MCPChat(use_cache)
     chat.debug_mode = True  # Enable debug for demonstration
     
     # Simulate a user's request
@@ -312,10 +262,18 @@ def demonstrate_tool_flow():
 # ============================================================
 
 if __name__ == "__main__":
-    if len(sys.argv) > 1 and sys.argv[1] == "demo":
+    logging.basicConfig(format="%(message)s")
+    logger.setLevel(logging.DEBUG)  # Emitted only while debug mode is on
+    
+    args = sys.argv[1:]
+    use_cache = "--cache" in args  # Opt-in: only repeatable at TEMPERATURE 0
+    if use_cache:
+        args.remove("--cache")
+    
+    if args and args[0] == "demo":
         # Run demonstration
-        demonstrate_tool_flow()
+        demonstrate_tool_flow(use_cache)
     else:
         # Run interactive chat
-        chat = MCPChat()
+        chat = MCPChat(use_cache)
         chat.run()
\ No newline at end of file
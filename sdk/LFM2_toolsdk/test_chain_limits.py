@@ -8,16 +8,28 @@ Tests two limits:
 Uses realistic mock data to avoid pattern detection.
 """
 
-import requests
-import json
-from typing import List, Dict, Optional, Tuple
+import sys
+import functools
+from types import MappingProxyType
+from typing import List, Dict, Tuple
 import re
 import random
 
+from _api import ChatAPI, _dumps, encode_tools, extract_tool_calls
+
 
 BASE_URL = "http://localhost:8080/v1"
 MODEL_NAME = "LFM2-1.2B-Tool-Q4_K_M-cuda"
 # MODEL_NAME = "LFM2-8B-A1B-BF16-cuda"
+# Ask the model to interpret each chain step's result (one extra round-trip per step)
+DEBUG_INTERPRETATIONS = False
+# Memoized LLM replies to repeated identical requests (0 disables) - safe at temperature 0
+RESPONSE_CACHE_SIZE = 256
+# Memoized mock results (0 disables)
+MOCK_CACHE_SIZE = 1024
+
+# Mock execution: tool name plus the value of a leading key="value" / key='value' argument
+_MOCK_CALL_RE = re.compile(r'(\w+)\(\s*(?:\w+\s*=\s*(["\'])(.*?)\2)?')
 
 # ============================================================
 # REALISTIC MOCK DATA
@@ -184,95 +196,75 @@ REALISTIC_DATA = {
     }
 }
 
+# Tool name -> (REALISTIC_DATA section, result when the key is missing)
+_ROUTE_SOURCES = {
+    "lookup_user":         ("users",         {"error": "User not found"}),
+    "get_user_orders":     ("orders",        []),
+    "get_order_details":   ("order_details", {"error": "Order not found"}),
+    "check_inventory":     ("inventory",     {"error": "Product not found"}),
+    "get_supplier_info":   ("suppliers",     {"error": "Supplier not found"}),
+    "get_contact_details": ("contacts",      {"error": "Contact not found"}),
+    "get_territory_info":  ("territories",   {"error": "Territory not found"}),
+    "get_manager_info":    ("managers",      {"error": "Manager not found"}),
+}
 
-# ============================================================
-# CORE FUNCTIONS
-# ============================================================
 
-def call_api(messages: List[Dict], tools: Optional[List[Dict]] = None) -> str:
-    """Raw API call"""
-    payload = {
-        "model": MODEL_NAME,
-        "messages": messages,
-        "temperature": 0,
-        # "top_p" : 0.95,
-        "max_tokens": 512
+def _encode_routes() -> Dict[str, Tuple[Dict[str, str], str]]:
+    """Pre-encode every mock result as JSON: tool name -> (key -> JSON, missing-key JSON)"""
+    return {
+        name: (
+            {sys.intern(key): _dumps(value) for key, value in REALISTIC_DATA[section].items()},
+            _dumps(default)
+        )
+        for name, (section, default) in _ROUTE_SOURCES.items()
     }
-    if tools:
-        payload["tools"] = tools
-    
-    response = requests.post(f"{BASE_URL}/chat/completions", json=payload)
-    data = response.json()
-    
-    if "error" in data:
-        raise Exception(f"API Error: {data['error']['message']}")
-    
-    return data["choices"][0]["message"]["content"]
 
 
-def extract_tool_calls(content: str) -> List[str]:
-    """Extract tool calls from response"""
-    if "<|tool_call_start|>" not in content:
-        return []
-    
-    start = content.find("<|tool_call_start|>") + len("<|tool_call_start|>")
-    end = content.find("<|tool_call_end|>")
-    if end == -1:
-        return []
-    
-    calls_str = content[start:end].strip().strip("[]")
-    if not calls_str:
-        return []
-    
-    return re.findall(r'\w+\([^)]*\)', calls_str)
+def _freeze(value):
+    """Read-only deep copy: dicts become mapping proxies, lists tuples, strings interned"""
+    if isinstance(value, dict):
+        return MappingProxyType({sys.intern(k): _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, str):
+        return sys.intern(value)
+    return value
 
 
+# Encoded once at import; REALISTIC_DATA is then frozen so the encoded tables cannot go stale
+_ROUTES = _encode_routes()
+_UNKNOWN_ROUTE = ({}, _dumps({"error": "Unknown tool"}))
+REALISTIC_DATA = _freeze(REALISTIC_DATA)
+
+
+# ============================================================
+# CORE FUNCTIONS
+# ============================================================
+
+# Raw API call - streamed, stops reading once a tool call is complete
+call_api = ChatAPI(
+    BASE_URL,
+    MODEL_NAME,
+    incremental=True,  # chain conversations only grow - encode each message once
+    cache_size=RESPONSE_CACHE_SIZE,
+    temperature=0,
+    # top_p=0.95,
+    max_tokens=512
+)
+
+
+@functools.lru_cache(maxsize=MOCK_CACHE_SIZE)
 def mock_tool_execution(tool_call: str) -> str:
     """Execute tool with realistic mock data"""
     
-    # Parse tool name
-    tool_name = tool_call.split("(")[0]
-    
-    # Extract parameter value (simple extraction)
-    if '="' in tool_call or "='" in tool_call:
-        # Find the value between quotes
-        parts = tool_call.split('="') if '="' in tool_call else tool_call.split("='")
-        if len(parts) > 1:
-            param_value = parts[1].split('"')[0] if '="' in tool_call else parts[1].split("'")[0]
-        else:
-            param_value = None
-    else:
-        param_value = None
+    # Parse tool name and first quoted parameter value in one match
+    m = _MOCK_CALL_RE.match(tool_call)
+    tool_name = m.group(1) if m else tool_call.split("(", 1)[0]
+    param_value = m.group(3) if m else None
     
     # Route to appropriate data source
-    if tool_name == "lookup_user":
-        result = REALISTIC_DATA["users"].get(param_value, {"error": "User not found"})
-        
-    elif tool_name == "get_user_orders":
-        result = REALISTIC_DATA["orders"].get(param_value, [])
-        
-    elif tool_name == "get_order_details":
-        result = REALISTIC_DATA["order_details"].get(param_value, {"error": "Order not found"})
-        
-    elif tool_name == "check_inventory":
-        result = REALISTIC_DATA["inventory"].get(param_value, {"error": "Product not found"})
-        
-    elif tool_name == "get_supplier_info":
-        result = REALISTIC_DATA["suppliers"].get(param_value, {"error": "Supplier not found"})
-        
-    elif tool_name == "get_contact_details":
-        result = REALISTIC_DATA["contacts"].get(param_value, {"error": "Contact not found"})
-        
-    elif tool_name == "get_territory_info":
-        result = REALISTIC_DATA["territories"].get(param_value, {"error": "Territory not found"})
-        
-    elif tool_name == "get_manager_info":
-        result = REALISTIC_DATA["managers"].get(param_value, {"error": "Manager not found"})
-        
-    else:
-        result = {"error": "Unknown tool"}
-    
-    return json.dumps(result)
+    table, default = _ROUTES.get(tool_name, _UNKNOWN_ROUTE)
+    return table.get(param_value, default)
 
 
 # ============================================================
@@ -393,6 +385,7 @@ CHAIN_TOOLS = [
         }
     }
 ]
+CHAIN_TOOLS_JSON = encode_tools(CHAIN_TOOLS)  # Sent with every request - encoded once
 
 
 # ============================================================
@@ -432,7 +425,7 @@ def test_chain_depth():
         conversation.append({"role": "user", "content": query})
         
         # Get model response
-        response = call_api(conversation, CHAIN_TOOLS)
+        response = call_api(conversation, CHAIN_TOOLS_JSON)
         calls = extract_tool_calls(response)
         
         print(f"Calls: {calls}")
@@ -465,10 +458,11 @@ def test_chain_depth():
             "result": tool_result
         })
         
-        # Get model's interpretation
-        interpretation = call_api(conversation, CHAIN_TOOLS)
-        print(f"Model interpretation: {interpretation[:80]}...")
-        conversation.append({"role": "assistant", "content": interpretation})
+        # Get model's interpretation - the tool result is already in context, so debug only
+        if DEBUG_INTERPRETATIONS:
+            interpretation = call_api(conversation, CHAIN_TOOLS_JSON)
+            print(f"Model interpretation: {interpretation[:80]}...")
+            conversation.append({"role": "assistant", "content": interpretation})
     
     print(f"\n✓ SUCCESS - Chain completed all {len(chain_steps)} steps")
     return len(chain_steps), chain_history
@@ -518,12 +512,13 @@ def test_history_retention(chain_history: List[Dict]):
         print(f"Expected to mention: {expected_value}")
         
         conversation.append({"role": "user", "content": query})
-        response = call_api(conversation, CHAIN_TOOLS)
+        response = call_api(conversation, CHAIN_TOOLS_JSON)
         
         print(f"Response: {response[:100]}...")
         
-        # Check if expected value is in response
-        if expected_value.lower() in response.lower():
+        # Check if expected value is in response - lowered once, reusable for more checks
+        resp_lower = response.lower()
+        if expected_value.lower() in resp_lower:
             print(f"✓ SUCCESS - Correctly recalled")
             successful_recalls += 1
         else:
@@ -0,0 +1,154 @@
+"""
+ChainState Prompt-Prefix Test
+
+Intent: Check that the orchestrators' history compaction keeps a stable prompt prefix:
+1. The pinned head and summaries only change at compactions, by appending a summary
+   (or, rarely, folding them all into one) - never rewritten message by message
+2. Compaction fires rarely - each one frees a fixed share of the budget (or ten messages),
+   even when the recent messages alone exceed the compaction trigger
+3. No empty summaries; the running token count matches a full recount
+
+No LLM server needed - runs ChainState from both orchestrator scripts offline.
+Run directly or with pytest.
+"""
+
+import logging
+from typing import List, Tuple
+
+import continous_orchestrator
+import tool_chain_orchestrator
+
+
+MODULES = (tool_chain_orchestrator, continous_orchestrator)
+TURNS = 60
+TOKEN_BUDGET = 2000
+# Filler words per turn: moderate turns take ~10% of the budget, heavy ones ~40% -
+# there the last ten messages alone exceed the 90% compaction trigger
+MODERATE, HEAVY = 30, 160
+
+
+def run_turns(module, filler: int, turns: int = TURNS) -> Tuple[List[List[str]], List[int], int, object]:
+    """
+    Feed a tool-using conversation through ChainState.
+    Returns the prompt prefix after every message, grouped per turn, the turns
+    in which the summaries were folded, the tokens added, and the final state.
+    """
+    state = module.ChainState(token_budget=TOKEN_BUDGET)
+    state.add_message("system", "You are a customer support agent. " * 8)
+
+    prefixes, fold_turns = [], []
+    previous_summaries = 0
+    added_tokens = 0
+    for turn in range(turns):
+        call = f'lookup_user(email="user{turn}@example.com")'
+        messages = [
+            ("user", f"Question {turn}: what is the status of order {turn}? " + "details " * filler, None),
+            ("assistant", f"<|tool_call_start|>[{call}]<|tool_call_end|>", None),
+            ("tool", module._dumps({"order": turn, "items": ["widget"] * filler}), call),
+            ("assistant", f"Order {turn} has shipped. It arrives soon. " + "more " * filler, None),
+        ]
+        turn_prefixes = []
+        for role, content, tool_call in messages:
+            state.add_message(role, content, tool_call)
+            added_tokens += module._estimate_tokens(content)
+            # Pinned head + summaries - the prefix the server's prompt cache reuses
+            summaries = len(state._compressed_middle)
+            prefix_len = len(state._pinned_head) + summaries
+            turn_prefixes.append(module._dumps(state.materialize_prompt()[:prefix_len]))
+            if summaries < previous_summaries:  # All summaries were folded into one
+                fold_turns.append(turn)
+            previous_summaries = summaries
+        prefixes.append(turn_prefixes)
+
+        recount = sum(module._estimate_tokens(m["content"]) for m in state.conversation)
+        assert state._token_count == recount, f"turn {turn}: running {state._token_count} != recount {recount}"
+    return prefixes, fold_turns, added_tokens, state
+
+
+def check_prefix(module, filler: int):
+    """Assert the prefix is append-only (except at folds) and only changes at real compactions"""
+    prefixes, fold_turns, added_tokens, _ = run_turns(module, filler)
+    changes = 0
+    previous = prefixes[0][-1]
+    for turn, turn_prefixes in enumerate(prefixes[1:], 1):
+        for current in turn_prefixes:
+            if current == previous:
+                continue
+            changes += 1
+            # Append-only: the old message list (minus its closing bracket) is a byte prefix
+            assert current.startswith(previous[:-1]) or turn in fold_turns, \
+                f"{module.__name__}: turn {turn} rewrote the prompt prefix"
+            previous = current
+
+    # Each compaction frees (trigger - COMPACT_TO) of the budget, or trims the
+    # message count from max_history down to the ten most recent messages
+    by_tokens = added_tokens / ((0.9 - module.COMPACT_TO) * TOKEN_BUDGET)
+    by_count = 4 * TURNS / (module.MAX_HISTORY_MESSAGES - 10)
+    max_changes = int(by_tokens + by_count) + 1
+    assert changes <= max_changes, f"{module.__name__}: prefix changed {changes} times (bound {max_changes})"
+    assert len(fold_turns) <= changes // module.MAX_SUMMARIES + 1, f"{module.__name__}: {len(fold_turns)} folds"
+
+
+def test_prefix_stable_between_compactions():
+    """Moderate turns: the prefix stays byte-identical for several turns at a time"""
+    for module in MODULES:
+        check_prefix(module, MODERATE)
+
+
+def test_prefix_under_heavy_pressure():
+    """Heavy turns: compaction still frees a share of the budget, never one message at a time"""
+    for module in MODULES:
+        check_prefix(module, HEAVY)
+
+
+def test_no_empty_summaries():
+    """Every summary carries evicted content and the history stays within budget"""
+    for module in MODULES:
+        for filler in (MODERATE, HEAVY):
+            _, _, _, state = run_turns(module, filler)
+            assert state._compressed_middle, f"{module.__name__}: budget pressure never compacted"
+            for message in state._compressed_middle:
+                assert "Executed 0 tool calls" not in message["content"]
+                assert message["content"].strip() != "Previous context summary:"
+            assert state._token_count <= TOKEN_BUDGET
+
+
+def test_tool_results_only_add_no_summary():
+    """Evicting only tool results leaves the summaries untouched"""
+    for module in MODULES:
+        state = module.ChainState(token_budget=TOKEN_BUDGET)
+        state.add_message("system", "You are a customer support agent.")
+        for i in range(30):
+            state.add_message("tool", module._dumps({"row": i, "data": "x" * 200}), f"get_row(id=\"{i}\")")
+        assert state._compressed_middle == []
+
+
+def main():
+    """Run all tests"""
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+
+    print("="*60)
+    print("CHAIN STATE PROMPT-PREFIX TEST")
+    print("="*60)
+
+    tests = [
+        test_prefix_stable_between_compactions,
+        test_prefix_under_heavy_pressure,
+        test_no_empty_summaries,
+        test_tool_results_only_add_no_summary,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"  ✓ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"  ✗ {test.__name__}: {e}")
+
+    print(f"\n{len(tests) - failed}/{len(tests)} passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
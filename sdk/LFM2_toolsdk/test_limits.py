@@ -8,78 +8,60 @@ Axis 3: Sequential calls, simple tools
 Each test runs complete cycles with mocked tool execution.
 """
 
-import requests
-import json
-from typing import List, Dict, Optional, Tuple
+import sys
 import re
+from typing import Callable, List, Dict, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+
+from _api import ChatAPI, _dumps, encode_tools, extract_tool_calls
 
 
 BASE_URL = "http://localhost:8080/v1"
 MODEL_NAME = "LFM2-1.2B-Tool-Q4_K_M-cuda"
 # MODEL_NAME = "LFM2-8B-A1B-UD-Q3_K_XL-cuda" # fail
 # MODEL_NAME = "LFM2-8B-A1B-BF16-cuda"
-
+AXIS_WORKERS = 4  # Trials run concurrently per axis - keep within the server's slot count
+# Memoized LLM replies to repeated identical requests - opt-in, sampling runs at temperature 0.3
+RESPONSE_CACHE_SIZE = 0
+EXHAUSTIVE = False  # Test every count even past the first failure (--exhaustive)
+FINAL_PREVIEW_TOKENS = 32  # Trials only log the start of the final answer - stop streaming it here
 
 # ============================================================
 # CORE FUNCTIONS
 # ============================================================
 
-def call_api(messages: List[Dict], tools: Optional[List[Dict]] = None) -> str:
-    """Raw API call"""
-    payload = {
-        "model": MODEL_NAME,
-        "messages": messages,
-        "temperature": 0.3,
-        "max_tokens": 512
-    }
-    if tools:
-        payload["tools"] = tools
-    
-    response = requests.post(f"{BASE_URL}/chat/completions", json=payload)
-    data = response.json()
-    
-    if "error" in data:
-        raise Exception(f"API Error: {data['error']['message']}")
-    
-    return data["choices"][0]["message"]["content"]
-
-
-def extract_tool_calls(content: str) -> List[str]:
-    """Extract tool calls from response"""
-    if "<|tool_call_start|>" not in content:
-        return []
-    
-    start = content.find("<|tool_call_start|>") + len("<|tool_call_start|>")
-    end = content.find("<|tool_call_end|>")
-    if end == -1:
-        return []
-    
-    calls_str = content[start:end].strip().strip("[]")
-    if not calls_str:
-        return []
-    
-    return re.findall(r'\w+\([^)]*\)', calls_str)
+# Raw API call - streamed, stops reading once a tool call is complete
+call_api = ChatAPI(BASE_URL, MODEL_NAME, incremental=True, cache_size=RESPONSE_CACHE_SIZE, temperature=0.3, max_tokens=512)
 
 
 def mock_tool_execution(tool_call: str) -> str:
     """Mock tool execution - generic response"""
-    return json.dumps({"status": "success", "data": "mocked_result"})
+    return _dumps({"status": "success", "data": "mocked_result"})
 
 
-def run_cycle(user_query: str, tools: List[Dict], verbose: bool = False) -> Tuple[List[str], str]:
+def run_cycle(
+    user_query: str,
+    tools: List[Dict],
+    verbose: bool = False,
+    out: Callable[[str], None] = print,
+    final_tokens: Optional[int] = None
+) -> Tuple[List[str], str]:
     """
     Run complete tool cycle.
+    Verbose lines go to `out` (print by default); the final response is cut
+    after final_tokens tokens when given.
     Returns: (extracted_calls, final_response)
     """
     conversation = [{"role": "user", "content": user_query}]
+    tools_json = encode_tools(tools)  # Shared by both calls of the cycle
     
     # Get tool calls
-    tool_call_response = call_api(conversation, tools)
+    tool_call_response = call_api(conversation, tools_json)
     calls = extract_tool_calls(tool_call_response)
     
     if verbose:
-        print(f"  Query: {user_query[:60]}...")
-        print(f"  Calls: {calls}")
+        out(f"  Query: {user_query[:60]}...")
+        out(f"  Calls: {calls}")
     
     if not calls:
         return [], tool_call_response
@@ -91,10 +73,10 @@ def run_cycle(user_query: str, tools: List[Dict], verbose: bool = False) -> Tupl
         conversation.append({"role": "tool", "content": result})
     
     # Get final response
-    final_response = call_api(conversation, tools)
+    final_response = call_api(conversation, tools_json, max_deltas=final_tokens)
     
     if verbose:
-        print(f"  Final: {final_response[:60]}...")
+        out(f"  Final: {final_response[:60]}...")
     
     return calls, final_response
 
@@ -103,15 +85,22 @@ def run_cycle(user_query: str, tools: List[Dict], verbose: bool = False) -> Tupl
 # TOOL GENERATORS
 # ============================================================
 
+# Numbered names and values, prebuilt once for the axis loops
+_NAME_COUNT = 128
+_TOOL_NAMES = tuple(f"tool_{i+1}" for i in range(_NAME_COUNT))
+_PARAM_NAMES = tuple(f"param_{i+1}" for i in range(_NAME_COUNT))
+_PARAM_VALUES = tuple(f"value{i+1}" for i in range(_NAME_COUNT))
+# Whole numbered parameter names in a call - param_1 must not match inside param_10
+_PARAM_NAME_RE = re.compile(r'\bparam_\d+\b')
+
+
 def generate_tool_with_n_params(n_params: int) -> Dict:
     """Generate a tool with N parameters"""
-    properties = {}
-    required = []
-    
-    for i in range(n_params):
-        param_name = f"param_{i+1}"
-        properties[param_name] = {"type": "string"}
-        required.append(param_name)
+    if n_params <= _NAME_COUNT:
+        required = list(_PARAM_NAMES[:n_params])
+    else:
+        required = [f"param_{i+1}" for i in range(n_params)]
+    properties = {param_name: {"type": "string"} for param_name in required}
     
     return {
         "type": "function",
@@ -127,33 +116,97 @@ def generate_tool_with_n_params(n_params: int) -> Dict:
     }
 
 
+def _simple_tool(i: int) -> Dict:
+    """Tool number i+1, sharing the one parameter schema"""
+    return {
+        "type": "function",
+        "function": {
+            "name": _TOOL_NAMES[i] if i < _NAME_COUNT else f"tool_{i+1}",
+            "description": f"This is tool number {i+1}",
+            "parameters": _SIMPLE_PARAMS
+        }
+    }
+
+
+# Single-input schema shared by every simple tool, and the largest set any axis uses
+_SIMPLE_PARAMS = {
+    "type": "object",
+    "properties": {
+        "input": {"type": "string"}
+    },
+    "required": ["input"]
+}
+_ALL_TOOLS = [_simple_tool(i) for i in range(100)]
+
+
 def generate_n_simple_tools(n_tools: int) -> List[Dict]:
     """Generate N tools with simple parameters"""
-    tools = []
-    
-    for i in range(n_tools):
-        tools.append({
-            "type": "function",
-            "function": {
-                "name": f"tool_{i+1}",
-                "description": f"This is tool number {i+1}",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "input": {"type": "string"}
-                    },
-                    "required": ["input"]
-                }
-            }
-        })
-    
-    return tools
+    if n_tools <= len(_ALL_TOOLS):
+        return _ALL_TOOLS[:n_tools]
+    return [_simple_tool(i) for i in range(n_tools)]
+
+
+def run_trials(counts: List[int], trial: Callable[[int], Tuple[Dict, List[str]]]) -> Dict[int, Dict]:
+    """
+    Run independent trials concurrently, printing their logs in order.
+    Stops at the first failure (or error, even when EXHAUSTIVE) - limits are
+    monotonic, so larger counts would fail too; queued trials are cancelled.
+    """
+    results = {}
+    with ThreadPoolExecutor(max_workers=AXIS_WORKERS) as ex:
+        futures = [ex.submit(trial, n) for n in counts]
+        for n, future in zip(counts, futures):
+            result, log = future.result()
+            print("\n".join(log))
+            results[n] = result
+            if "error" in result or not (result["success"] or EXHAUSTIVE):
+                ex.shutdown(cancel_futures=True)
+                break
+    return results
 
 
 # ============================================================
 # AXIS 1: SINGLE TOOL - PARAMETER SCALING
 # ============================================================
 
+def _axis1_trial(n_params: int) -> Tuple[Dict, List[str]]:
+    """One axis-1 configuration: returns (result, log lines)"""
+    log = [f"\n--- Testing {n_params} parameters ---"]
+    
+    tool = generate_tool_with_n_params(n_params)
+    
+    # Generate query mentioning all params
+    param_values = _PARAM_VALUES[:n_params]
+    query = f"Call the test tool with these values: {', '.join(param_values)}"
+    
+    try:
+        calls, final = run_cycle(query, [tool], verbose=True, out=log.append,
+                                 final_tokens=FINAL_PREVIEW_TOKENS)
+        
+        # Check if tool was called
+        success = len(calls) > 0 and "test_tool" in calls[0]
+        
+        # Try to count how many params were included
+        param_count_in_call = len(
+            set(_PARAM_NAME_RE.findall(calls[0])).intersection(_PARAM_NAMES[:n_params])
+        ) if calls else 0
+        
+        result = {
+            "success": success,
+            "called": len(calls) > 0,
+            "params_included": param_count_in_call
+        }
+        
+        status = "✓" if success else "✗"
+        log.append(f"  Result: {status} - Included {param_count_in_call}/{n_params} params")
+        
+    except Exception as e:
+        log.append(f"  Result: ✗ ERROR - {str(e)[:50]}")
+        result = {"success": False, "error": str(e)}
+    
+    return result, log
+
+
 def test_axis1_parameter_scaling():
     """
     Test: Single tool with increasing parameters
@@ -164,39 +217,7 @@ def test_axis1_parameter_scaling():
     print("="*60)
     
     param_counts = [1, 2, 5, 10, 15, 20, 25, 30]
-    results = {}
-    
-    for n_params in param_counts:
-        print(f"\n--- Testing {n_params} parameters ---")
-        
-        tool = generate_tool_with_n_params(n_params)
-        
-        # Generate query mentioning all params
-        param_values = [f"value{i+1}" for i in range(n_params)]
-        query = f"Call the test tool with these values: {', '.join(param_values)}"
-        
-        try:
-            calls, final = run_cycle(query, [tool], verbose=True)
-            
-            # Check if tool was called
-            success = len(calls) > 0 and "test_tool" in calls[0]
-            
-            # Try to count how many params were included
-            param_count_in_call = sum(1 for i in range(n_params) if f"param_{i+1}" in calls[0]) if calls else 0
-            
-            results[n_params] = {
-                "success": success,
-                "called": len(calls) > 0,
-                "params_included": param_count_in_call
-            }
-            
-            status = "✓" if success else "✗"
-            print(f"  Result: {status} - Included {param_count_in_call}/{n_params} params")
-            
-        except Exception as e:
-            print(f"  Result: ✗ ERROR - {str(e)[:50]}")
-            results[n_params] = {"success": False, "error": str(e)}
-            break
+    results = run_trials(param_counts, _axis1_trial)
     
     # Summary
     print("\n" + "-"*60)
@@ -219,6 +240,37 @@ def test_axis1_parameter_scaling():
 # AXIS 2: MULTIPLE TOOLS - SIMPLE PARAMETERS
 # ============================================================
 
+def _axis2_trial(n_tools: int) -> Tuple[Dict, List[str]]:
+    """One axis-2 configuration: returns (result, log lines)"""
+    log = [f"\n--- Testing {n_tools} tools ---"]
+    
+    tools = generate_n_simple_tools(n_tools)
+    
+    # Test: Can it select tool_1 from N tools?
+    query = "Use tool_1 with input 'test'"
+    
+    try:
+        calls, final = run_cycle(query, tools, verbose=True, out=log.append,
+                                 final_tokens=FINAL_PREVIEW_TOKENS)
+        
+        # Check if correct tool was called
+        correct_tool = len(calls) > 0 and "tool_1" in calls[0]
+        
+        result = {
+            "success": correct_tool,
+            "called": len(calls) > 0,
+            "correct_tool": correct_tool
+        }
+        
+        status = "✓" if correct_tool else "✗"
+        log.append(f"  Result: {status}")
+        
+    except Exception as e:
+        log.append(f"  Result: ✗ ERROR - {str(e)[:50]}")
+        result = {"success": False, "error": str(e)}
+    
+    return result, log
+
 def test_axis2_multiple_tools():
     """
     Test: Multiple tools with simple parameters
@@ -229,35 +281,7 @@ def test_axis2_multiple_tools():
     print("="*60)
     
     tool_counts = [1, 5, 10, 20, 30, 50, 75, 100]
-    results = {}
-    
-    for n_tools in tool_counts:
-        print(f"\n--- Testing {n_tools} tools ---")
-        
-        tools = generate_n_simple_tools(n_tools)
-        
-        # Test: Can it select tool_1 from N tools?
-        query = "Use tool_1 with input 'test'"
-        
-        try:
-            calls, final = run_cycle(query, tools, verbose=True)
-            
-            # Check if correct tool was called
-            correct_tool = len(calls) > 0 and "tool_1" in calls[0]
-            
-            results[n_tools] = {
-                "success": correct_tool,
-                "called": len(calls) > 0,
-                "correct_tool": correct_tool
-            }
-            
-            status = "✓" if correct_tool else "✗"
-            print(f"  Result: {status}")
-            
-        except Exception as e:
-            print(f"  Result: ✗ ERROR - {str(e)[:50]}")
-            results[n_tools] = {"success": False, "error": str(e)}
-            break
+    results = run_trials(tool_counts, _axis2_trial)
     
     # Summary
     print("\n" + "-"*60)
@@ -279,6 +303,40 @@ def test_axis2_multiple_tools():
 # AXIS 3: SEQUENTIAL CALLS - SIMPLE TOOLS
 # ============================================================
 
+def _axis3_trial(n_calls: int, tools: List[Dict]) -> Tuple[Dict, List[str]]:
+    """One axis-3 configuration: returns (result, log lines)"""
+    log = [f"\n--- Testing {n_calls} sequential calls ---"]
+    
+    # Generate query asking for N tool calls
+    tool_names = _TOOL_NAMES[:n_calls]
+    query = f"Call these tools in order: {', '.join(tool_names)}"
+    
+    try:
+        calls, final = run_cycle(query, tools, verbose=True, out=log.append,
+                                 final_tokens=FINAL_PREVIEW_TOKENS)
+        
+        # Check how many calls were made
+        actual_calls = len(calls)
+        
+        # Check if right tools were called
+        called_names = [call[:call.index("(")] for call in calls]
+        correct_tools = sum(map(str.__eq__, tool_names, called_names))
+        
+        result = {
+            "success": actual_calls >= n_calls,
+            "actual_calls": actual_calls,
+            "correct_tools": correct_tools
+        }
+        
+        status = "✓" if actual_calls >= n_calls else "✗"
+        log.append(f"  Result: {status} - Got {actual_calls}/{n_calls} calls, {correct_tools} correct")
+        
+    except Exception as e:
+        log.append(f"  Result: ✗ ERROR - {str(e)[:50]}")
+        result = {"success": False, "error": str(e)}
+    
+    return result, log
+
 def test_axis3_sequential_calls():
     """
     Test: Sequential tool calls in single turn
@@ -289,41 +347,11 @@ def test_axis3_sequential_calls():
     print("="*60)
     
     call_counts = [1, 2, 3, 5, 7, 10, 15, 20]
-    results = {}
     
     # Create enough tools for testing
     tools = generate_n_simple_tools(20)
     
-    for n_calls in call_counts:
-        print(f"\n--- Testing {n_calls} sequential calls ---")
-        
-        # Generate query asking for N tool calls
-        tool_names = [f"tool_{i+1}" for i in range(n_calls)]
-        query = f"Call these tools in order: {', '.join(tool_names)}"
-        
-        try:
-            calls, final = run_cycle(query, tools, verbose=True)
-            
-            # Check how many calls were made
-            actual_calls = len(calls)
-            
-            # Check if right tools were called
-            correct_tools = sum(1 for i in range(min(n_calls, actual_calls)) 
-                              if f"tool_{i+1}" in calls[i]) if calls else 0
-            
-            results[n_calls] = {
-                "success": actual_calls >= n_calls,
-                "actual_calls": actual_calls,
-                "correct_tools": correct_tools
-            }
-            
-            status = "✓" if actual_calls >= n_calls else "✗"
-            print(f"  Result: {status} - Got {actual_calls}/{n_calls} calls, {correct_tools} correct")
-            
-        except Exception as e:
-            print(f"  Result: ✗ ERROR - {str(e)[:50]}")
-            results[n_calls] = {"success": False, "error": str(e)}
-            break
+    results = run_trials(call_counts, lambda n_calls: _axis3_trial(n_calls, tools))
     
     # Summary
     print("\n" + "-"*60)
@@ -381,4 +409,5 @@ def main():
 
 
 if __name__ == "__main__":
+    EXHAUSTIVE = "--exhaustive" in sys.argv[1:]
     main()
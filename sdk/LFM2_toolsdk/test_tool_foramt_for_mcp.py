@@ -3,10 +3,40 @@ DEFINITIVE TOOL FORMAT TEST
 Tests if LFM2 actually calls tools with the correct nested format
 """
 import requests
+from requests.adapters import HTTPAdapter
 import json
+import re
+
+try:
+    import orjson
+
+    def _dumps_indent(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
+    _dumps_bytes = orjson.dumps
+    _loads = orjson.loads
+except ImportError:  # orjson is optional - fall back to stdlib json
+    def _dumps_indent(obj) -> str:
+        return json.dumps(obj, indent=2)
+
+    def _dumps_bytes(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+    _loads = json.loads
 
 LLM_URL = "http://localhost:8080/v1"
 MODEL = "LFM2-1.2B-Tool-Q4_K_M-cuda"
+MAX_TOKENS = 64  # Only the tool-call block matters - a tight budget ends generation soon after it
+
+# Shared HTTP session - reuses keep-alive connections across test requests
+_SESSION = requests.Session()
+_SESSION.headers["Content-Type"] = "application/json"
+_SESSION.mount("http://", HTTPAdapter(pool_connections=2, pool_maxsize=32, max_retries=0))
+
+# Tool-call sentinels and the block between them, compiled once
+_TC_START = "<|tool_call_start|>"
+_TC_END = "<|tool_call_end|>"
+_BLOCK_RE = re.compile(re.escape(_TC_START) + r'(.*?)' + re.escape(_TC_END), re.DOTALL)
 
 # ✅ CORRECT NESTED FORMAT (as per your spec)
 TOOLS = [
@@ -80,15 +110,15 @@ def test_tool_calling():
         messages = [{"role": "user", "content": test["query"]}]
         
         # Call LLM with tools
-        response = requests.post(
+        response = _SESSION.post(
             f"{LLM_URL}/chat/completions",
-            json={
+            data=_dumps_bytes({
                 "model": MODEL,
                 "messages": messages,
                 "tools": TOOLS,
                 "temperature": 0,
-                "max_tokens": 256
-            }
+                "max_tokens": MAX_TOKENS
+            })
         )
         
         if response.status_code != 200:
@@ -96,20 +126,19 @@ def test_tool_calling():
             print(f"  Response: {response.text}")
             continue
         
-        data = response.json()
+        data = _loads(response.content)
         content = data["choices"][0]["message"]["content"]
         
         print(f"\nRaw Response:")
         print(content)
         
         # Check for tool call markers
-        if "<|tool_call_start|>" in content and "<|tool_call_end|>" in content:
+        m = _BLOCK_RE.search(content)
+        if m:
             print(f"\n✓ Tool call detected!")
             
             # Extract tool call
-            start = content.find("<|tool_call_start|>") + len("<|tool_call_start|>")
-            end = content.find("<|tool_call_end|>")
-            tool_str = content[start:end].strip()
+            tool_str = m.group(1).strip()
             
             print(f"  Tool call: {tool_str}")
             
@@ -126,7 +155,8 @@ def test_tool_calling():
     print(f"\n{'='*60}")
     print("VERIFY: Tool Format Being Sent")
     print(f"{'='*60}")
-    print(json.dumps(TOOLS[0], indent=2))
+    print(_dumps_indent(TOOLS[0]))
 
 if __name__ == "__main__":
-    test_tool_calling()
+    with _SESSION:
+        test_tool_calling()
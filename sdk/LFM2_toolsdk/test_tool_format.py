@@ -11,12 +11,68 @@ Possible schemas to try:
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
+import re
 from typing import List, Dict
 
+try:
+    import orjson
+
+    def _dumps_indent(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
+    _dumps_bytes = orjson.dumps
+    _loads = orjson.loads
+except ImportError:  # orjson is optional - fall back to stdlib json
+    def _dumps_indent(obj) -> str:
+        return json.dumps(obj, indent=2)
+
+    def _dumps_bytes(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+    _loads = json.loads
+
+try:
+    import httpx
+except ImportError:  # httpx is optional - fall back to a requests session
+    httpx = None
+
+try:
+    import h2  # noqa: F401 - enables HTTP/2 in httpx
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
 
 BASE_URL = "http://localhost:8080/v1"
 MODEL_NAME = "LFM2-8B-A1B-BF16-cuda"
+MAX_TOKENS = 64  # Only the tool-call block matters - a tight budget ends generation soon after it
+
+# Shared HTTP client - reuses keep-alive connections across test requests.
+# httpx when installed (HTTP/2 with h2, over TLS endpoints), else a requests session
+if httpx is not None:
+    _SESSION = httpx.Client(
+        http2=_HTTP2,
+        headers={"Content-Type": "application/json"},
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
+    )
+else:
+    _SESSION = requests.Session()
+    _SESSION.headers["Content-Type"] = "application/json"
+    _SESSION.mount("http://", HTTPAdapter(pool_connections=2, pool_maxsize=32, max_retries=0))
+
+# Tool-call sentinels and the block between them, compiled once
+_TC_START = "<|tool_call_start|>"
+_TC_END = "<|tool_call_end|>"
+_BLOCK_RE = re.compile(re.escape(_TC_START) + r'(.*?)' + re.escape(_TC_END), re.DOTALL)
+
+
+def _post(url: str, body: bytes):
+    """POST an encoded JSON body through the shared client"""
+    if httpx is not None:
+        return _SESSION.post(url, content=body, timeout=30)
+    return _SESSION.post(url, data=body, timeout=30)
 
 
 def test_format(format_name: str, tools_payload, messages: List[Dict]):
@@ -29,21 +85,17 @@ def test_format(format_name: str, tools_payload, messages: List[Dict]):
         "model": MODEL_NAME,
         "messages": messages,
         "temperature": 0.3,
-        "max_tokens": 512,
+        "max_tokens": MAX_TOKENS,
         "tools": tools_payload
     }
     
     print(f"Tools structure:")
-    print(json.dumps(tools_payload, indent=2)[:300] + "...")
+    print(_dumps_indent(tools_payload)[:300] + "...")
     
     try:
-        response = requests.post(
-            f"{BASE_URL}/chat/completions",
-            json=payload,
-            timeout=30
-        )
+        response = _post(f"{BASE_URL}/chat/completions", _dumps_bytes(payload))
         
-        data = response.json()
+        data = _loads(response.content)
         
         if "error" in data:
             error_msg = data['error']['message']
@@ -60,12 +112,9 @@ def test_format(format_name: str, tools_payload, messages: List[Dict]):
             print(f"✅ SUCCESS!")
             print(f"Response: {content[:150]}...")
             
-            if "<|tool_call_start|>" in content:
-                start = content.find("<|tool_call_start|>") + len("<|tool_call_start|>")
-                end = content.find("<|tool_call_end|>")
-                if end != -1:
-                    calls = content[start:end]
-                    print(f"Tool calls found: {calls}")
+            m = _BLOCK_RE.search(content)
+            if m:
+                print(f"Tool calls found: {m.group(1)}")
             return True
         
         print(f"❌ Unexpected response format")
@@ -247,4 +296,5 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    with _SESSION:
+        main()
@@ -11,14 +11,112 @@ Server: localhost:8080/v1 (OpenAI-compatible with custom tool call format)
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import re
-from typing import List, Dict, Optional, Tuple
+import functools
+import logging
+import os
+import sys
+from typing import Callable, List, Dict, Optional, Set, Tuple
 from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+    def _dumps_indent(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
+    _dumps_bytes = orjson.dumps
+    _loads = orjson.loads
+except ImportError:  # orjson is optional - fall back to stdlib json
+    def _dumps(obj) -> str:
+        return json.dumps(obj)
+
+    def _dumps_indent(obj) -> str:
+        return json.dumps(obj, indent=2)
+
+    def _dumps_bytes(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+    _loads = json.loads
+
+try:
+    import httpx
+except ImportError:  # httpx is optional - fall back to a requests session
+    httpx = None
+
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick is optional - fall back to one substring scan per name
+    ahocorasick = None
+
+try:
+    import h2  # noqa: F401 - enables HTTP/2 in httpx
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
 
 
 BASE_URL = "http://localhost:8080/v1"
 MODEL_NAME = "LFM2-8B-A1B-BF16-cuda"
+TEMPERATURE = 0.3
+PROBE_WORKERS = 4  # Independent sweep probes run concurrently - keep within the server's slot count
+# Generation budgets - probes only need the tool-call block (or the list of tool names),
+# so a tight max_tokens ends generation soon after it
+CALL_MAX_TOKENS = 64  # Basic and multi-turn probes - one tool call
+SEQUENTIAL_MAX_TOKENS = 128  # Up to three tool calls in one block
+LIST_MAX_TOKENS = 128  # Visibility probes - the model lists tool names
+
+# Raw API responses are logged at DEBUG - set LOG_LEVEL=DEBUG or pass -v to see them
+logger = logging.getLogger("test_toolcall")
+
+# Shared HTTP client - reuses keep-alive connections across test requests.
+# httpx when installed (HTTP/2 with h2, over TLS endpoints), else a requests session
+if httpx is not None:
+    _SESSION = httpx.Client(
+        http2=_HTTP2,
+        headers={"Content-Type": "application/json"},
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
+    )
+    _HTTP_ERRORS = (httpx.HTTPError,)
+else:
+    _SESSION = requests.Session()
+    _SESSION.headers["Content-Type"] = "application/json"
+    _SESSION.mount("http://", HTTPAdapter(pool_connections=2, pool_maxsize=32, max_retries=0))
+    _HTTP_ERRORS = (requests.exceptions.RequestException,)
+
+# Tool-call sentinels and patterns, compiled once for every extraction
+_TC_START = "<|tool_call_start|>"
+_TC_END = "<|tool_call_end|>"
+# Delimited payload with optional [ ] and padding, captured in one search
+_PAYLOAD_RE = re.compile(
+    re.escape(_TC_START) + r'\s*\[?(.*?)\]?\s*' + re.escape(_TC_END), re.DOTALL
+)
+_CALL_RE = re.compile(r'\w+\([^)]*\)')
+
+
+@functools.lru_cache(maxsize=None)
+def _name_finder(names: Tuple[str, ...]) -> Callable[[str], Set[str]]:
+    """Function returning which of names occur in a text - one Aho-Corasick pass when available"""
+    if ahocorasick is None:
+        return lambda text: {name for name in names if name in text}
+    automaton = ahocorasick.Automaton()
+    for name in names:
+        automaton.add_word(name, name)
+    automaton.make_automaton()
+    return lambda text: {name for _, name in automaton.iter(text)}
+
+
+def _post(url: str, body: bytes):
+    """POST an encoded JSON body through the shared client"""
+    if httpx is not None:
+        return _SESSION.post(url, content=body, timeout=30)
+    return _SESSION.post(url, data=body, timeout=30)
 
 
 @dataclass
@@ -120,31 +218,34 @@ TOOLS = [
 ]
 
 
-def chat(messages: List[Dict], tools: Optional[List[Dict]] = None) -> APIResponse:
+# Request body around the messages array - TOOLS never changes, so the tail for each
+# prefix TOOLS[:n] is encoded once and only messages are encoded per call
+_BODY_HEAD = _dumps_bytes({"model": MODEL_NAME})[:-1] + b',"messages":'
+
+
+@functools.lru_cache(maxsize=None)
+def _body_tail(n_tools: int, max_tokens: int) -> bytes:
+    """Request body after the messages array, for one tools prefix and token budget"""
+    return (
+        b"," + _dumps_bytes({"temperature": TEMPERATURE, "max_tokens": max_tokens})[1:-1]
+        + (b',"tools":' + _dumps_bytes(TOOLS[:n_tools]) if n_tools else b"") + b"}"
+    )
+
+
+def chat(messages: List[Dict], n_tools: int = 0, max_tokens: int = 512) -> APIResponse:
     """
-    Send chat completion request to local LLM API.
+    Send chat completion request to local LLM API, offering the first n_tools of TOOLS.
     
     Returns APIResponse with success status and either content or error.
     """
-    payload = {
-        "model": MODEL_NAME,
-        "messages": messages,
-        "temperature": 0.3,
-        "max_tokens": 512
-    }
-    
-    if tools:
-        payload["tools"] = tools
+    body = _BODY_HEAD + _dumps_bytes(messages) + _body_tail(n_tools, max_tokens)
     
     try:
-        response = requests.post(
-            f"{BASE_URL}/chat/completions",
-            json=payload,
-            timeout=30
-        )
+        response = _post(f"{BASE_URL}/chat/completions", body)
         
-        data = response.json()
-        print(f"\n[DEBUG] API Response:\n{json.dumps(data, indent=2)}\n")
+        data = _loads(response.content)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("\n[DEBUG] API Response:\n%s\n", _dumps_indent(data))
         
         if "error" in data:
             return APIResponse(
@@ -163,7 +264,7 @@ def chat(messages: List[Dict], tools: Optional[List[Dict]] = None) -> APIRespons
         content = data["choices"][0]["message"]["content"]
         return APIResponse(success=True, content=content, raw_data=data)
         
-    except requests.exceptions.RequestException as e:
+    except _HTTP_ERRORS as e:
         return APIResponse(success=False, error=f"Request failed: {str(e)}")
     except json.JSONDecodeError as e:
         return APIResponse(success=False, error=f"JSON decode failed: {str(e)}")
@@ -178,31 +279,41 @@ def extract_tool_calls(response_content: str) -> List[str]:
     
     Returns list of tool call strings like ["get_weather(city='Paris')", ...]
     """
-    if not response_content or "<|tool_call_start|>" not in response_content:
-        return []
-    
-    start_marker = "<|tool_call_start|>"
-    end_marker = "<|tool_call_end|>"
-    
-    start_idx = response_content.find(start_marker)
-    if start_idx == -1:
-        return []
-    
-    start_idx += len(start_marker)
-    end_idx = response_content.find(end_marker, start_idx)
-    
-    if end_idx == -1:
-        return []
-    
-    calls_section = response_content[start_idx:end_idx].strip()
-    calls_section = calls_section.strip("[]").strip()
-    
-    if not calls_section:
+    if not response_content:
         return []
     
     # Extract function call patterns: function_name(...)
-    pattern = r'\w+\([^)]*\)'
-    return re.findall(pattern, calls_section)
+    m = _PAYLOAD_RE.search(response_content)
+    return _CALL_RE.findall(m.group(1)) if m else []
+
+
+def find_limit(probe: Callable[[int], bool], max_n: int) -> int:
+    """
+    Exponential-search scaling: largest n in 1..max_n for which probe(n) passes,
+    assuming probes pass up to a limit and fail beyond it.
+    Probes n = 1, 2, 4, ... (and max_n) concurrently, then binary-searches the gap
+    between the last pass and the first failure - O(log N) probes instead of N.
+    """
+    rungs = [1 << i for i in range(max_n.bit_length()) if 1 << i < max_n] + [max_n]
+    
+    last_pass, first_fail = 0, max_n + 1
+    with ThreadPoolExecutor(max_workers=PROBE_WORKERS) as ex:
+        futures = [ex.submit(probe, n) for n in rungs]
+        for n, future in zip(rungs, futures):
+            if not future.result():
+                first_fail = n
+                break
+            last_pass = n
+        # Past the first failing rung - drop the probes that have not started
+        ex.shutdown(cancel_futures=True)
+    
+    while first_fail - last_pass > 1:
+        mid = (last_pass + first_fail) // 2
+        if probe(mid):
+            last_pass = mid
+        else:
+            first_fail = mid
+    return last_pass
 
 
 def test_basic_call() -> Tuple[bool, str]:
@@ -211,10 +322,10 @@ def test_basic_call() -> Tuple[bool, str]:
     print("TEST 1: Basic Tool Call")
     print("="*60)
     
-    tools = [TOOLS[0]]  # Just get_weather
+    n_tools = 1  # Just get_weather
     messages = [{"role": "user", "content": "What's the weather in Paris?"}]
     
-    result = chat(messages, tools)
+    result = chat(messages, n_tools, CALL_MAX_TOKENS)
     
     if not result.success:
         return False, f"API call failed: {result.error}"
@@ -234,28 +345,27 @@ def test_tool_visibility(max_tools: int = 8) -> Tuple[int, str]:
     print("TEST 2: Tool Visibility")
     print("="*60)
     
-    max_visible = 0
+    outcomes = {}  # n -> status line, for every n actually probed
     
-    for n in range(1, max_tools + 1):
-        tools = TOOLS[:n]
-        tool_names = [t["name"] for t in tools]
+    def probe(n: int) -> bool:
+        tool_names = tuple(t["name"] for t in TOOLS[:n])
         
         prompt = f"List all {n} available tools by name"
-        result = chat([{"role": "user", "content": prompt}], tools)
+        result = chat([{"role": "user", "content": prompt}], n, LIST_MAX_TOKENS)
         
         if not result.success:
-            print(f"  {n} tools: FAIL - {result.error}")
-            break
+            outcomes[n] = f"FAIL - {result.error}"
+            return False
         
-        mentioned_count = sum(1 for name in tool_names if name in result.content)
+        mentioned_count = len(_name_finder(tool_names)(result.content))
         status = "PASS" if mentioned_count == n else "FAIL"
-        
-        print(f"  {n} tools: {status} ({mentioned_count}/{n} visible)")
-        
-        if mentioned_count == n:
-            max_visible = n
-        else:
-            break
+        outcomes[n] = f"{status} ({mentioned_count}/{n} visible)"
+        return mentioned_count == n
+    
+    max_visible = find_limit(probe, max_tools)
+    
+    for n in sorted(outcomes):
+        print(f"  {n} tools: {outcomes[n]}")
     
     return max_visible, f"Model can see up to {max_visible} tools"
 
@@ -266,7 +376,7 @@ def test_sequential_calls() -> Tuple[int, str]:
     print("TEST 3: Sequential Multi-Tool Calls")
     print("="*60)
     
-    tools = TOOLS[:3]  # get_weather, calculate, search_web
+    n_tools = 3  # get_weather, calculate, search_web
     
     test_cases = [
         (1, "What's the weather in Paris?"),
@@ -276,25 +386,30 @@ def test_sequential_calls() -> Tuple[int, str]:
     
     max_achieved = 0
     
-    for expected_count, prompt in test_cases:
-        print(f"\n  Expected {expected_count} calls: {prompt}")
-        
-        result = chat([{"role": "user", "content": prompt}], tools)
-        
-        if not result.success:
-            print(f"    FAIL - {result.error}")
-            break
-        
-        calls = extract_tool_calls(result.content)
-        actual_count = len(calls)
-        status = "PASS" if actual_count >= expected_count else "FAIL"
-        
-        print(f"    {status} - Got {actual_count} calls: {calls}")
-        
-        if actual_count >= expected_count:
-            max_achieved = expected_count
-        else:
-            break
+    # Cases are independent - run them concurrently, judge them in order
+    with ThreadPoolExecutor(max_workers=PROBE_WORKERS) as ex:
+        futures = [ex.submit(chat, [{"role": "user", "content": prompt}], n_tools, SEQUENTIAL_MAX_TOKENS) for _, prompt in test_cases]
+        for (expected_count, prompt), future in zip(test_cases, futures):
+            print(f"\n  Expected {expected_count} calls: {prompt}")
+            
+            result = future.result()
+            
+            if not result.success:
+                print(f"    FAIL - {result.error}")
+                break
+            
+            calls = extract_tool_calls(result.content)
+            actual_count = len(calls)
+            status = "PASS" if actual_count >= expected_count else "FAIL"
+            
+            print(f"    {status} - Got {actual_count} calls: {calls}")
+            
+            if actual_count >= expected_count:
+                max_achieved = expected_count
+            else:
+                break
+        # Stopped early - drop the cases that have not started
+        ex.shutdown(cancel_futures=True)
     
     return max_achieved, f"Model can handle {max_achieved} sequential calls"
 
@@ -305,11 +420,11 @@ def test_multi_turn() -> Tuple[bool, str]:
     print("TEST 4: Multi-Turn Conversation")
     print("="*60)
     
-    tools = TOOLS[:2]  # get_weather, calculate
+    n_tools = 2  # get_weather, calculate
     messages = [{"role": "user", "content": "What's the weather in Tokyo?"}]
     
     print("\n  Turn 1: Initial query")
-    result = chat(messages, tools)
+    result = chat(messages, n_tools, CALL_MAX_TOKENS)
     
     if not result.success:
         return False, f"Turn 1 failed: {result.error}"
@@ -324,12 +439,12 @@ def test_multi_turn() -> Tuple[bool, str]:
     messages.append({"role": "assistant", "content": result.content})
     messages.append({
         "role": "tool",
-        "content": json.dumps([{"temp": 22, "condition": "sunny"}])
+        "content": _dumps([{"temp": 22, "condition": "sunny"}])
     })
     messages.append({"role": "user", "content": "Now calculate 15 * 4"})
     
     print("\n  Turn 2: Follow-up query")
-    result = chat(messages, tools)
+    result = chat(messages, n_tools, CALL_MAX_TOKENS)
     
     if not result.success:
         return False, f"Turn 2 failed: {result.error}"
@@ -395,4 +510,7 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    level = "DEBUG" if "-v" in sys.argv[1:] else os.environ.get("LOG_LEVEL", "INFO").upper()
+    logging.basicConfig(level=level, format="%(message)s")
+    with _SESSION:
+        main()
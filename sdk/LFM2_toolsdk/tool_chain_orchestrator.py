@@ -3,12 +3,60 @@ Production Tool Chain Orchestrator
 Runs continuously with discovered limits in mind
 """
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import gzip
+import hashlib
+import threading
 import time
-from typing import List, Dict, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import List, Dict, Optional, Tuple, Deque
+from collections import OrderedDict, deque
 from datetime import datetime
 from enum import Enum
 import re
+import sys
+import logging
+
+try:
+    import orjson
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+    def _dumps_bytes(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:  # orjson is optional - fall back to stdlib json
+    def _dumps(obj) -> str:
+        return json.dumps(obj)
+
+    def _dumps_bytes(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+
+    def _estimate_tokens(text: str) -> int:
+        return len(_ENCODING.encode(text))
+except Exception:  # tiktoken missing or encoding unavailable offline
+    def _estimate_tokens(text: str) -> int:
+        return len(text) // 4  # ~4 characters per token
+
+logger = logging.getLogger("orchestrator")
+_RULE = "=" * 60
+
+def _force_verbose():
+    """Make verbose output visible even when the host never configured logging"""
+    if not logger.isEnabledFor(logging.INFO):
+        logger.setLevel(logging.INFO)
+    if not logger.hasHandlers():
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+
 
 # ============================================================
 # CONFIGURATION
@@ -19,7 +67,35 @@ MODEL_NAME = "LFM2-1.2B-Tool-Q4_K_M-cuda"
 # Limits discovered from testing (adjust based on your test results)
 MAX_CHAIN_DEPTH = 8  # Maximum tool chain before reset
 MAX_HISTORY_MESSAGES = 20  # Maximum messages before summarization
+TOKEN_BUDGET = 6000  # Estimated prompt tokens; compaction fires at 90%
+COMPACT_TO = 0.6  # Compaction trims history to this share of TOKEN_BUDGET, so it fires rarely
+MIN_RECENT = 2  # Latest messages never evicted (the current query and its reply)
+MAX_SUMMARIES = 4  # Append-only history summaries before they are folded into one
+SUMMARY_MAX_CHARS = 2000  # Size cap for a folded summary
 RECALL_SAFE_DEPTH = 5  # Steps back that model can reliably recall
+GZIP_REQUESTS = False  # Gzip POST bodies - only if the server accepts Content-Encoding: gzip
+N_PARALLEL = 4  # Server parallel slots (llama.cpp --parallel) for independent queries
+RESPONSE_CACHE_SIZE = 0  # Per-orchestrator LRU of temperature-0 replies (0 disables; opt in with care)
+
+# Shared HTTP session - reuses keep-alive connections across chain iterations
+_SESSION = requests.Session()
+_SESSION.headers.update({"Connection": "keep-alive"})
+_ADAPTER = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=2, backoff_factor=0.1, status_forcelist=[502, 503, 504])
+)
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.mount("https://", _ADAPTER)
+
+# Tool-call sentinels and call pattern, hoisted out of extract_tool_calls
+_TC_START = "<|tool_call_start|>"
+_TC_END = "<|tool_call_end|>"
+_TC_START_LEN = len(_TC_START)
+_TC_END_LEN = len(_TC_END)
+_TOOL_CALL_RE = re.compile(r'\w+\([^)]*\)')
+# Tool name plus the first quoted argument value, in one pass
+_CALL_RE = re.compile(r'(\w+)\(\s*(?:\w+\s*=\s*(["\'])(.*?)\2)?')
 
 
 # ============================================================
@@ -29,23 +105,60 @@ class ChainState:
     """Manages conversation state with limit awareness"""
     
     def __init__(self, max_depth: int = MAX_CHAIN_DEPTH, 
-                 max_history: int = MAX_HISTORY_MESSAGES):
-        self.conversation: List[Dict] = []
+                 max_history: int = MAX_HISTORY_MESSAGES,
+                 token_budget: int = TOKEN_BUDGET):
+        # Prompt layout: [*pinned head, *compressed middle, *recent tail].
+        # Head and middle only grow at their ends, so consecutive requests
+        # share a long identical prefix the server's prompt cache can reuse
+        self._pinned_head: List[Dict] = []  # First message, never mutated
+        self._compressed_middle: List[Dict] = []  # Append-only summaries
+        self._middle_tokens = 0  # Token estimate of the summaries
+        self._recent_tail: Deque[Dict] = deque()
+        self._tail_tokens: Deque[int] = deque()  # Token estimate of each tail message
         self.chain_depth = 0
         self.max_depth = max_depth
         self.max_history = max_history
+        self.token_budget = token_budget
+        self._token_count = 0  # Running estimate for self.conversation, never recounted
         self.tool_results_cache: Dict[str, str] = {}
-        self.last_n_results: List[Dict] = []  # For recall testing
+        # Ring buffer of recent results for recall testing
+        self.last_n_results: Deque[Dict] = deque(maxlen=RECALL_SAFE_DEPTH)
+        # Tallies over messages evicted since the last summary
+        self._evicted_tool_call_count = 0
+        self._evicted_sample_calls: List[str] = []  # First 5 evicted calls
+        # Asymmetric compression: user turns kept near-verbatim, assistant
+        # turns reduced to a one-sentence gist, tool results dropped
+        self._evicted_user_notes: Deque[str] = deque(maxlen=10)
+        self._evicted_assistant_gists: Deque[str] = deque(maxlen=5)
+        # id(tool message) -> originating call, for prompt placeholders
+        self._tool_call_of: Dict[int, str] = {}
+    
+    @property
+    def conversation(self) -> List[Dict]:
+        """All messages, in prompt order"""
+        return [*self._pinned_head, *self._compressed_middle, *self._recent_tail]
         
-    def add_message(self, role: str, content: str):
+    def add_message(self, role: str, content: str, tool_call: Optional[str] = None):
         """Add message and check if limits exceeded"""
-        self.conversation.append({"role": role, "content": content})
+        message = {"role": role, "content": content}
+        tokens = _estimate_tokens(content)
+        if self._pinned_head:
+            self._recent_tail.append(message)
+            self._tail_tokens.append(tokens)
+        else:
+            self._pinned_head.append(message)
+        if tool_call is not None:
+            self._tool_call_of[id(message)] = tool_call
+        
+        self._token_count += tokens
         
-        if role == "assistant" and "<|tool_call_start|>" in content:
+        if role == "assistant" and _TC_START in content:
             self.chain_depth += 1
             
-        # Check if we need to compress history
-        if len(self.conversation) > self.max_history:
+        # Compress on the real resource (tokens, keeping 10% headroom);
+        # max_history remains a hard cap on uncompressed message count
+        if (self._token_count > 0.9 * self.token_budget
+                or len(self._pinned_head) + len(self._recent_tail) > self.max_history):
             self._compress_history()
             
     def cache_tool_result(self, tool_call: str, result: str):
@@ -55,41 +168,98 @@ class ChainState:
             "depth": self.chain_depth,
             "call": tool_call,
             "result": result,
-            "timestamp": datetime.now().isoformat()
-        })
-        # Keep only last RECALL_SAFE_DEPTH results
-        if len(self.last_n_results) > RECALL_SAFE_DEPTH:
-            self.last_n_results.pop(0)
+            "timestamp": time.monotonic_ns()  # Internal ordering only
+        })  # deque maxlen keeps only the last RECALL_SAFE_DEPTH results
     
     def _compress_history(self):
         """Compress old conversation history to stay within limits"""
-        # Keep first message (system/instructions)
-        # Keep last N messages
-        # Summarize middle section
+        # First message stays pinned
+        # Evict the oldest tail messages down to keep_recent messages and
+        # COMPACT_TO of the budget - well below the trigger, so the prompt
+        # prefix then stays fixed for several turns
+        # Summarize the evicted ones into a new summary appended to the middle
         keep_recent = 10
+        target = COMPACT_TO * self.token_budget
+        
+        while len(self._recent_tail) > MIN_RECENT and (
+                len(self._recent_tail) > keep_recent or self._token_count > target):
+            self._evict(self._recent_tail.popleft())
+            self._token_count -= self._tail_tokens.popleft()
         
-        if len(self.conversation) <= keep_recent + 1:
+        # Nothing worth summarizing evicted (none, or tool results only)
+        if not (self._evicted_tool_call_count or self._evicted_user_notes
+                or self._evicted_assistant_gists):
             return
-            
-        summary = self._create_summary(
-            self.conversation[1:-keep_recent]
-        )
         
-        self.conversation = [
-            self.conversation[0],  # First message
-            {"role": "system", "content": f"Previous context summary: {summary}"},
-            *self.conversation[-keep_recent:]  # Recent messages
-        ]
+        summary = f"Previous context summary: {self._create_summary()}"
+        self._compressed_middle.append({"role": "system", "content": summary})
+        middle_tokens = self._middle_tokens + _estimate_tokens(summary)
+        if len(self._compressed_middle) > MAX_SUMMARIES:
+            # Rare fold of all summaries into one - costs a single cache miss
+            merged = "\n".join(m["content"] for m in self._compressed_middle)
+            folded = _trim_middle(merged, min(1.0, SUMMARY_MAX_CHARS / len(merged)))
+            self._compressed_middle = [{"role": "system", "content": folded}]
+            middle_tokens = _estimate_tokens(folded)
+        self._token_count += middle_tokens - self._middle_tokens
+        self._middle_tokens = middle_tokens
+    
+    def materialize_prompt(self) -> List[Dict]:
+        """
+        Build the outgoing message list. Tool results older than the last
+        RECALL_SAFE_DEPTH are replaced by a placeholder naming their call -
+        the full result stays in tool_results_cache, so nothing is lost.
+        """
+        tail = []
+        recent_tool_results = 0
+        for msg in reversed(self._recent_tail):
+            if msg["role"] == "tool":
+                recent_tool_results += 1
+                call = self._tool_call_of.get(id(msg))
+                if recent_tool_results > RECALL_SAFE_DEPTH and call is not None:
+                    msg = {"role": "tool", "content": f"<cached: {call}>"}
+            tail.append(msg)
+        tail.reverse()
+        return [*self._pinned_head, *self._compressed_middle, *tail]
+    
+    def _evict(self, msg: Dict):
+        """Fold an evicted message into the pending summary tallies"""
+        self._tool_call_of.pop(id(msg), None)
+        role, content = msg["role"], msg["content"]
         
-    def _create_summary(self, messages: List[Dict]) -> str:
-        """Create summary of conversation segment"""
-        tool_calls = []
-        for msg in messages:
-            if msg["role"] == "assistant" and "<|tool_call_start|>" in msg["content"]:
-                calls = extract_tool_calls(msg["content"])
-                tool_calls.extend(calls)
+        if role == "user":
+            # User constraints are expensive to lose - keep ~70%
+            self._evicted_user_notes.append(_trim_middle(content.strip(), 0.7))
+        elif role == "assistant":
+            tool_start = content.find(_TC_START)
+            if tool_start != -1:
+                calls = extract_tool_calls(content)
+                self._evicted_tool_call_count += len(calls)
+                missing = 5 - len(self._evicted_sample_calls)
+                if missing > 0:
+                    self._evicted_sample_calls.extend(calls[:missing])
+                content = content[:tool_start]
+            gist = _first_sentence(content)
+            if gist:
+                self._evicted_assistant_gists.append(gist)
+        # Tool results are dropped - they remain in tool_results_cache
         
-        return f"Executed {len(tool_calls)} tool calls: {', '.join(tool_calls[:5])}"
+    def _create_summary(self) -> str:
+        """Summarize messages evicted since the last summary, then reset tallies"""
+        lines = []
+        if self._evicted_tool_call_count:
+            lines.append(f"Executed {self._evicted_tool_call_count} tool calls: "
+                         f"{', '.join(self._evicted_sample_calls)}")
+        if self._evicted_user_notes:
+            lines.append("Earlier user requests: " + " | ".join(self._evicted_user_notes))
+        if self._evicted_assistant_gists:
+            lines.append("Earlier answers: " + " | ".join(self._evicted_assistant_gists))
+        summary = "\n".join(lines)
+        
+        self._evicted_tool_call_count = 0
+        self._evicted_sample_calls = []
+        self._evicted_user_notes.clear()
+        self._evicted_assistant_gists.clear()
+        return summary
     
     def should_reset_chain(self) -> bool:
         """Check if chain should be reset"""
@@ -101,34 +271,78 @@ class ChainState:
         # Optionally keep cached results
         
 
+def _trim_middle(text: str, keep_ratio: float, min_len: int = 200) -> str:
+    """Keep head and tail of long text, dropping the middle"""
+    if len(text) <= min_len:
+        return text
+    keep = int(len(text) * keep_ratio)
+    head = keep * 5 // 7
+    return f"{text[:head]} ... {text[len(text) - (keep - head):]}"
+
+
+def _first_sentence(text: str, max_len: int = 160) -> str:
+    """First sentence of text, capped at max_len characters"""
+    text = text.strip()
+    end = text.find(". ")
+    if end != -1:
+        text = text[:end + 1]
+    return text[:max_len]
+
+
 # ============================================================
 # CORE API FUNCTIONS
 # ============================================================
 def call_api(messages: List[Dict], tools: Optional[List[Dict]] = None, 
-             temperature: float = 0) -> str:
-    """API call with error handling"""
+             temperature: float = 0, tools_blob: Optional[bytes] = None) -> str:
+    """
+    API call with error handling
+    tools_blob: pre-encoded tools fragment from encode_tools(), spliced into
+    the body so a static tools schema is not re-serialized on every call
+    """
+    return _post_chat(_request_body(messages, tools, temperature, tools_blob))
+
+
+def _request_body(messages: List[Dict], tools: Optional[List[Dict]] = None,
+                  temperature: float = 0, tools_blob: Optional[bytes] = None) -> bytes:
+    """Uncompressed chat completion request body"""
     payload = {
         "model": MODEL_NAME,
         "messages": messages,
         "temperature": temperature,
-        "max_tokens": 512
+        "max_tokens": 512,
+        "stream": True
     }
-    if tools:
-        payload["tools"] = tools
+    if tools_blob is None and tools:
+        tools_blob = encode_tools(tools)
+    
+    body = _dumps_bytes(payload)
+    if tools_blob:
+        body = body[:-1] + b"," + tools_blob + b"}"
+    return body
+
+
+def encode_tools(tools: List[Dict]) -> bytes:
+    """Encode tools once as the inner '"tools":[...]' request body fragment"""
+    return _dumps_bytes({"tools": tools})[1:-1]
+
+
+def _post_chat(body: bytes) -> str:
+    """POST a streaming chat completion request and return the content"""
+    headers = {"Content-Type": "application/json"}
+    if GZIP_REQUESTS:
+        body = gzip.compress(body, compresslevel=3)
+        headers["Content-Encoding"] = "gzip"
     
     try:
-        response = requests.post(
+        response = _SESSION.post(
             f"{BASE_URL}/chat/completions", 
-            json=payload,
-            timeout=30
+            data=body,
+            headers=headers,
+            timeout=30,
+            stream=True
         )
         response.raise_for_status()
-        data = response.json()
-        
-        if "error" in data:
-            raise Exception(f"API Error: {data['error']['message']}")
-            
-        return data["choices"][0]["message"]["content"]
+        return _read_stream(response)
     
     except requests.exceptions.Timeout:
         raise Exception("API timeout")
@@ -136,22 +350,52 @@ def call_api(messages: List[Dict], tools: Optional[List[Dict]] = None,
         raise Exception(f"API request failed: {str(e)}")
 
 
+def _read_stream(response: requests.Response) -> str:
+    """Accumulate SSE content deltas, stopping as soon as a tool call closes"""
+    parts = []
+    tail = ""  # Carries a sentinel split across two deltas
+    try:
+        for line in response.iter_lines():
+            if not line.startswith(b"data: "):
+                continue
+            chunk = line[6:]
+            if chunk == b"[DONE]":
+                break
+            
+            data = json.loads(chunk)
+            if "error" in data:
+                raise Exception(f"API Error: {data['error']['message']}")
+            if not data.get("choices"):
+                continue
+            
+            delta = data["choices"][0].get("delta", {}).get("content")
+            if not delta:
+                continue
+            parts.append(delta)
+            
+            window = tail + delta
+            if _TC_END in window:
+                break
+            tail = window[-_TC_END_LEN:]
+    finally:
+        response.close()
+    
+    return "".join(parts)
+
+
 def extract_tool_calls(content: str) -> List[str]:
     """Extract tool calls from response"""
-    if "<|tool_call_start|>" not in content:
+    start = content.find(_TC_START)
+    if start == -1:
         return []
     
-    start = content.find("<|tool_call_start|>") + len("<|tool_call_start|>")
-    end = content.find("<|tool_call_end|>")
-    
+    start += _TC_START_LEN
+    end = content.find(_TC_END, start)
     if end == -1:
         return []
     
-    calls_str = content[start:end].strip().strip("[]")
-    if not calls_str:
-        return []
-    
-    return re.findall(r'\w+\([^)]*\)', calls_str)
+    # Scan the delimited region in place - no slice/strip copies
+    return _TOOL_CALL_RE.findall(content, start, end)
 
 
 # ============================================================
@@ -160,41 +404,43 @@ def extract_tool_calls(content: str) -> List[str]:
 class ToolExecutor:
     """Execute tools with realistic mock data"""
     
+    # tool name -> (data source key, not-found result)
+    _HANDLERS = {
+        "lookup_user": ("users", {"error": "User not found"}),
+        "get_user_orders": ("orders", []),
+        "get_order_details": ("order_details", {"error": "Order not found"}),
+        "check_inventory": ("inventory", {"error": "Product not found"}),
+        "get_supplier_info": ("suppliers", {"error": "Supplier not found"}),
+        "get_contact_details": ("contacts", {"error": "Contact not found"}),
+        "get_territory_info": ("territories", {"error": "Territory not found"}),
+        "get_manager_info": ("managers", {"error": "Manager not found"}),
+    }
+    # Read-only tools whose results may be served from the chain's cache
+    _IDEMPOTENT = frozenset(_HANDLERS)
+    
     def __init__(self, data_source: Dict):
         self.data = data_source
         
     def execute(self, tool_call: str) -> str:
         """Execute a tool call and return result"""
-        tool_name = tool_call.split("(")[0]
-        param_value = self._extract_param(tool_call)
-        
-        # Route to appropriate handler
-        handlers = {
-            "lookup_user": lambda p: self.data["users"].get(p, {"error": "User not found"}),
-            "get_user_orders": lambda p: self.data["orders"].get(p, []),
-            "get_order_details": lambda p: self.data["order_details"].get(p, {"error": "Order not found"}),
-            "check_inventory": lambda p: self.data["inventory"].get(p, {"error": "Product not found"}),
-            "get_supplier_info": lambda p: self.data["suppliers"].get(p, {"error": "Supplier not found"}),
-            "get_contact_details": lambda p: self.data["contacts"].get(p, {"error": "Contact not found"}),
-            "get_territory_info": lambda p: self.data["territories"].get(p, {"error": "Territory not found"}),
-            "get_manager_info": lambda p: self.data["managers"].get(p, {"error": "Manager not found"}),
-        }
+        m = _CALL_RE.match(tool_call)
+        if m is None:
+            return _dumps({"error": f"Unknown tool: {tool_call}"})
+        tool_name, param_value = m.group(1), m.group(3)
         
-        handler = handlers.get(tool_name)
-        if handler:
-            result = handler(param_value)
-        else:
+        # Route to appropriate data source
+        entry = self._HANDLERS.get(tool_name)
+        if entry is None:
             result = {"error": f"Unknown tool: {tool_name}"}
+        else:
+            key, default = entry
+            result = self.data[key].get(param_value, default)
             
-        return json.dumps(result)
+        return _dumps(result)
     
-    def _extract_param(self, tool_call: str) -> Optional[str]:
-        """Extract parameter value from tool call"""
-        if '="' in tool_call or "='" in tool_call:
-            parts = tool_call.split('="') if '="' in tool_call else tool_call.split("='")
-            if len(parts) > 1:
-                return parts[1].split('"')[0] if '="' in tool_call else parts[1].split("'")[0]
-        return None
+    def is_idempotent(self, tool_call: str) -> bool:
+        """Check if a tool call is safe to answer from cache"""
+        return tool_call[:tool_call.find("(")] in self._IDEMPOTENT
 
 
 # ============================================================
@@ -203,81 +449,162 @@ class ToolExecutor:
 class ToolChainOrchestrator:
     """Main orchestrator for continuous operation"""
     
-    def __init__(self, tools: List[Dict], data_source: Dict):
+    def __init__(self, tools: List[Dict], data_source: Dict, cache_size: int = RESPONSE_CACHE_SIZE,
+                 verbose: bool = True):
+        """
+        verbose: log each query's steps to the "orchestrator" logger at INFO -
+        forced visible on stdout when logging is not configured
+        cache_size: LRU of replies to byte-identical temperature-0 requests, kept
+        by this orchestrator only (0 disables). A long-running orchestrator whose
+        tool data changes should leave it off or call clear_cache() on updates.
+        """
         self.tools = tools
+        self._tools_blob = encode_tools(tools) if tools else None
         self.executor = ToolExecutor(data_source)
         self.state = ChainState()
+        # Independent tool calls from one response run concurrently
+        self._pool = ThreadPoolExecutor(max_workers=8)
+        self.cache_size = cache_size
+        self._resp_cache: "OrderedDict[bytes, str]" = OrderedDict()
+        self._cache_lock = threading.Lock()  # Batched queries share the cache
+        self.verbose = verbose
+        if verbose:
+            _force_verbose()
+    
+    def clear_cache(self):
+        """Drop every cached LLM reply"""
+        with self._cache_lock:
+            self._resp_cache.clear()
+    
+    def _call_api(self, messages: List[Dict]) -> str:
+        """call_api with this orchestrator's tools, through its reply cache when enabled"""
+        if self.cache_size <= 0:
+            return call_api(messages, tools_blob=self._tools_blob)
+        
+        body = _request_body(messages, tools_blob=self._tools_blob)
+        key = hashlib.blake2b(body, digest_size=16).digest()
+        with self._cache_lock:
+            content = self._resp_cache.get(key)
+            if content is not None:
+                self._resp_cache.move_to_end(key)
+                return content
         
-    def process_query(self, query: str) -> str:
+        content = _post_chat(body)
+        with self._cache_lock:
+            self._resp_cache[key] = content
+            if len(self._resp_cache) > self.cache_size:
+                self._resp_cache.popitem(last=False)
+        return content
+        
+    def process_query(self, query: str, state: Optional[ChainState] = None) -> str:
         """Process a single query with tool chaining"""
-        print(f"\n{'='*60}")
-        print(f"Processing: {query}")
-        print(f"Current chain depth: {self.state.chain_depth}/{self.state.max_depth}")
-        print(f"{'='*60}")
+        if state is None:
+            state = self.state
+        
+        info = self.verbose and logger.isEnabledFor(logging.INFO)
+        if info:
+            logger.info("\n%s\nProcessing: %s\nCurrent chain depth: %d/%d\n%s",
+                        _RULE, query, state.chain_depth, state.max_depth, _RULE)
         
         # Check if we need to reset chain
-        if self.state.should_reset_chain():
-            print("⚠️  Chain depth limit reached - resetting chain")
-            self.state.reset_chain()
+        if state.should_reset_chain():
+            logger.warning("⚠️  Chain depth limit reached - resetting chain")
+            state.reset_chain()
             # Add a summary message
-            self.state.add_message(
+            state.add_message(
                 "system",
                 "Chain reset. Previous tool results are still available."
             )
         
         # Add user query
-        self.state.add_message("user", query)
+        state.add_message("user", query)
         
         # Process with tools (allow multiple iterations)
         max_iterations = 5  # Prevent infinite loops
         for iteration in range(max_iterations):
-            print(f"\n--- Iteration {iteration + 1} ---")
+            if info:
+                logger.info("\n--- Iteration %d ---", iteration + 1)
             
             # Get model response
-            response = call_api(self.state.conversation, self.tools)
+            response = self._call_api(state.materialize_prompt())
             
             # Check for tool calls
             tool_calls = extract_tool_calls(response)
             
             if not tool_calls:
                 # No more tool calls - we have final answer
-                print("✓ Final answer generated")
-                self.state.add_message("assistant", response)
+                if info:
+                    logger.info("✓ Final answer generated")
+                state.add_message("assistant", response)
                 return response
             
             # Execute tools
-            print(f"Tool calls: {tool_calls}")
-            self.state.add_message("assistant", response)
+            if info:
+                logger.info("Tool calls: %s", tool_calls)
+            state.add_message("assistant", response)
             
-            for tool_call in tool_calls:
-                result = self.executor.execute(tool_call)
-                print(f"  → {tool_call}: {result[:80]}...")
+            # Results come back in call order, keeping message order deterministic
+            results = list(self._pool.map(
+                lambda tool_call: self._execute_cached(tool_call, state), tool_calls
+            ))
+            for tool_call, result in zip(tool_calls, results):
+                if info:
+                    logger.info("  → %s: %s...", tool_call, result[:80])
                 
-                self.state.add_message("tool", result)
-                self.state.cache_tool_result(tool_call, result)
+                state.add_message("tool", result, tool_call)
+                state.cache_tool_result(tool_call, result)
         
         # If we exhausted iterations, return last response
-        print("⚠️  Max iterations reached")
+        logger.warning("⚠️  Max iterations reached")
         return response
     
-    def run_continuously(self, query_stream):
-        """Process queries continuously from a stream"""
-        for query in query_stream:
-            try:
-                result = self.process_query(query)
-                yield {
-                    "query": query,
-                    "result": result,
-                    "chain_depth": self.state.chain_depth,
-                    "timestamp": datetime.now().isoformat()
-                }
-            except Exception as e:
-                print(f"✗ Error processing query: {str(e)}")
-                yield {
-                    "query": query,
-                    "error": str(e),
-                    "timestamp": datetime.now().isoformat()
-                }
+    def _execute_cached(self, tool_call: str, state: ChainState) -> str:
+        """Execute a tool call, reusing this chain's cached result when safe"""
+        if self.executor.is_idempotent(tool_call):
+            cached = state.tool_results_cache.get(tool_call)
+            if cached is not None:
+                return cached
+        return self.executor.execute(tool_call)
+    
+    def run_continuously(self, query_stream, batch_size: int = 1):
+        """
+        Process queries continuously from a stream
+        batch_size > 1: queries are independent - each batch runs concurrently
+        (up to the server's parallel slots) on fresh per-query ChainStates, so
+        self.state is left untouched; results are yielded in input order
+        """
+        if batch_size <= 1:
+            for query in query_stream:
+                yield self._run_query(query, self.state)
+            return
+        
+        queries = iter(query_stream)
+        with ThreadPoolExecutor(max_workers=batch_size) as pool:
+            while True:
+                batch = list(islice(queries, batch_size))
+                if not batch:
+                    break
+                futures = [pool.submit(self._run_query, q, ChainState()) for q in batch]
+                for future in futures:
+                    yield future.result()
+    
+    def _run_query(self, query: str, state: ChainState) -> Dict:
+        """Process one stream query into a result record"""
+        try:
+            result = self.process_query(query, state)
+            return {
+                "query": query,
+                "result": result,
+                "chain_depth": state.chain_depth,
+                "timestamp": datetime.now().isoformat()
+            }
+        except Exception as e:
+            logger.error("✗ Error processing query: %s", e)
+            return {
+                "query": query,
+                "error": str(e),
+                "timestamp": datetime.now().isoformat()
+            }
 
 
 # ============================================================
@@ -315,6 +642,8 @@ class InventoryMonitor:
 def main():
     """Example of continuous operation"""
     
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     # Import realistic data from original test
     from __main__ import REALISTIC_DATA, CHAIN_TOOLS
     
@@ -350,9 +679,10 @@ def main():
         "Get contact info for the Logitech supplier",
     ]
     
+    # One shared conversation; pass batch_size=N_PARALLEL to run independent queries concurrently
     for result in orchestrator.run_continuously(query_stream):
         print(f"\n✓ Processed: {result['query']}")
-        print(f"  Chain depth: {result['chain_depth']}")
+        print(f"  Chain depth: {result.get('chain_depth', '-')}")
         print(f"  Result: {result.get('result', result.get('error'))[:150]}...")
         time.sleep(1)
 